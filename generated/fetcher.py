@@ -1,8 +1,7 @@
-from autogen_core import MessageContext, message_handler, AgentId
-from autogen_agentchat.messages import TextMessage
 from autogen_ext.tools.mcp import StdioServerParams, mcp_server_tools
 from src.templates.base_agent import BaseAgent
-from src.utils import utils
+from src.utils.metrics import metrics
+from src.utils.tools import cache_tools, limit_tools, server_command
 import asyncio
 import logging
 import os
@@ -10,7 +9,7 @@ import time
 
 logger = logging.getLogger("main")
 
-TEMPLATE_VERSION = "1.0.0"
+TEMPLATE_VERSION = "1.4.2"
 
 class Agent(BaseAgent):
     def __init__(self, name, system_message, spec) -> None:
@@ -19,9 +18,15 @@ class Agent(BaseAgent):
         self._delegate = None 
         self.spec = spec or {}
 
+    async def _initialize(self) -> None:
+        await self.setup_tools()
+
     async def setup_tools(self):
         try:
             all_tools = []
+            # One limit for the whole agent, shared by the tools of every server
+            max_parallel = self.spec.get("max_parallel_tools")
+            semaphore = asyncio.Semaphore(int(max_parallel)) if max_parallel else None
             for spec in self._tools_specs:
                 try:
                     params = spec.get("params", {})
@@ -33,28 +38,32 @@ class Agent(BaseAgent):
                                 env_var = value[2:-1]
                                 env_value = os.getenv(env_var)
                                 if env_value is None:
-                                    logger.warning(f"Environment variable {env_var} not found for tool {spec.get('name', 'unknown')}")
+                                    logger.warning("Environment variable %s not found for tool %s", env_var, spec.get('name', 'unknown'))
                                 resolved_env[key] = env_value
                             else:
                                 resolved_env[key] = value
                         params["env"] = resolved_env
                     
-                    server = StdioServerParams(**params)
+                    server = StdioServerParams(**server_command(params))
                     tools = await mcp_server_tools(server)
+                    tools = cache_tools(tools, spec.get('name', 'unknown'), spec.get("cache"))
+                    tools = limit_tools(tools, spec.get("timeout", self.spec.get("tool_timeout")), semaphore, spec.get("timeouts"))
                     all_tools.extend(tools)
-                    logger.info(f"Successfully loaded {len(tools)} tools from {spec.get('name', 'unknown')}")
+                    logger.info("Successfully loaded %s tools from %s", len(tools), spec.get('name', 'unknown'))
                     
                 except Exception as e:
-                    logger.error(f"Failed to load tools from {spec.get('name', 'unknown')}: {e}")
+                    logger.error("Failed to load tools from %s: %s", spec.get('name', 'unknown'), e)
+                    metrics.increment("tools.load_failures")
                     continue
 
             await self._setup_delegate(all_tools)
-            logger.info(f"Successfully initialized {self._name} with {len(all_tools)} tools")
+            logger.info("Successfully initialized %s with %s tools", self._name, len(all_tools))
             
         except Exception as e:
-            logger.error(f"Failed to setup tools for {self._name}: {e}")
+            logger.error("Failed to setup tools for %s: %s", self._name, e)
+            metrics.increment("tools.load_failures")
             await self._setup_delegate([])
-            logger.warning(f"Initialized {self._name} without tools due to setup failure")
+            logger.warning("Initialized %s without tools due to setup failure", self._name)
 
     def _get_error_context(self) -> str:
         context = []
@@ -69,23 +78,3 @@ class Agent(BaseAgent):
         if self._last_activity:
             context.append(f"Last activity: {time.time() - self._last_activity:.1f}s ago")
         return "; ".join(context)
-
-    @message_handler
-    async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
-        if self._delegate is None:
-            await self.setup_tools()
-
-        logger.info(f"{self.id.type}: Received message\nFrom: {message.sender}")
-        text_message = TextMessage(content=message.content, source="user")
-        response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
-        result = utils.Message(content=response.chat_message.content, sender=self.spec.get("agent_name", "agent"))
-
-        output_to = self.spec.get("output_to")
-        if output_to:
-            logger.debug(f"Agent: {self.spec.get('agent_name', 'agent')} --> to: {output_to}")
-            await self.send_message(result, AgentId(output_to, "default"))
-        else:
-            logger.debug(f"Agent: {self.spec.get('agent_name', 'agent')} --> to: End")
-            await self.send_message(result, AgentId("End", "default"))
-        
-        return utils.Message(content="", sender=self.spec.get("agent_name", "agent"))
\ No newline at end of file
@@ -1,42 +1,191 @@
+import argparse
 import asyncio
+import contextlib
 import os
+import sys
+import time
+import uuid
+from typing import List, Optional, Tuple
 from src.utils import utils
 from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntimeHost, GrpcWorkerAgentRuntime
 from autogen_core import AgentId
 from src.agents.creator import Creator
 import logging
 from src.utils.utils import setup_logging
-import yaml
 from src.agents.end import End
 from src.agents.start import Start
 from workflow_state import workflow_state
+from src.utils.metrics import metrics
+from src.utils.plan import PlanError, WorkflowPlan
+from src.utils.batch import run_batch, settle_send
+from src.utils.soak import SoakLimits, run_soak
+from src.utils.watcher import watch_files
+from src.utils.profiling import LoopMonitor, sample_stacks
 from dotenv import load_dotenv
 
 logger = logging.getLogger("main")
 
+CONFIG_PATH = "config/agents.yaml"
+WATCH_PATTERNS = [CONFIG_PATH, "generated/*.py"]
+CREATOR_ID = AgentId("Creator", "default")
 
-async def main() -> None:
+
+async def run_workflow(worker: GrpcWorkerAgentRuntime, plan_id: str) -> Optional[Tuple[bool, str]]:
+    """Hand a plan to Creator and wait for the workflow result. Returns None if Creator had nothing to re-run."""
+    run_id = uuid.uuid4().hex
+    workflow_state.start_run(run_id)
+    timeout_seconds = get_workflow_timeout()
+    deadline = time.time() + timeout_seconds
+
+    logger.info("Sending message to Creator")
+    send = asyncio.create_task(worker.send_message(
+        utils.Message(content="", sender="Host", plan_id=plan_id, run_id=run_id, deadline=deadline),
+        CREATOR_ID
+    ))
+    completion = asyncio.ensure_future(workflow_state.wait_for_completion(run_id))
+    success = False
+
+    try:
+        # The send only returns once the whole chain has run, so race it against the run completing
+        await asyncio.wait({send, completion}, timeout=max(0.0, deadline - time.time()), return_when=asyncio.FIRST_COMPLETED)
+        if send.done() and not completion.done():
+            if send.exception() is not None:
+                return False, f"Failed to start workflow: {send.exception()}"
+            if send.result().content == Creator.UNCHANGED:
+                return None
+            await asyncio.wait({completion}, timeout=max(0.0, deadline - time.time()))
+
+        if completion.done():
+            success, result = completion.result()
+            return success, result
+
+        workflow_state.cancel_run(run_id)
+        timeout_minutes = timeout_seconds // 60
+        logger.error("❌ Workflow timed out after %s minutes", timeout_minutes)
+        return False, f"Workflow timed out after {timeout_minutes} minutes"
+    finally:
+        completion.cancel()
+        workflow_state.finish_run(run_id)
+        await settle_send(send, run_id, success)
+
+
+async def batch_workflow(worker: GrpcWorkerAgentRuntime, plan: WorkflowPlan, args: argparse.Namespace) -> None:
+    """Prepare the workflow agents once, then stream a JSONL file of inputs through them."""
+    logger.info("Preparing workflow agents for batch run")
+    response = await worker.send_message(utils.Message(content="", sender="Host", plan_id=plan.plan_id), CREATOR_ID)
+    if response.content and response.content != Creator.UNCHANGED:
+        logger.error("💥 Batch aborted: %s", response.content)
+        return
+
+    timeout_seconds = args.timeout or get_workflow_timeout()
+    logger.info("📦 Running batch %s -> %s (concurrency %s)", args.inputs, args.out, args.concurrency)
+    succeeded, failed, skipped = await run_batch(worker, plan, args.inputs, args.out, args.concurrency, timeout_seconds)
+    logger.info("📦 Batch finished: %s succeeded, %s failed, %s already done", succeeded, failed, skipped)
+
+    if metrics.snapshot():
+        logger.info("📊 Metrics: %s", metrics.summary())
+
+
+async def soak_workflow(worker: GrpcWorkerAgentRuntime, plan: WorkflowPlan, args: argparse.Namespace) -> bool:
+    """Prepare the workflow agents once, then run them repeatedly and check for resource growth."""
+    logger.info("Preparing workflow agents for soak run")
+    response = await worker.send_message(utils.Message(content="", sender="Host", plan_id=plan.plan_id), CREATOR_ID)
+    if response.content and response.content != Creator.UNCHANGED:
+        logger.error("💥 Soak aborted: %s", response.content)
+        return False
+
+    limits = SoakLimits(
+        memory_mb=args.max_memory_growth,
+        fds=args.max_fd_growth,
+        processes=args.max_process_growth,
+        tasks=args.max_task_growth
+    )
+    logger.info("🧪 Soaking %s for %s runs (model backend: %s)", args.config, args.iterations, os.getenv("MODEL_BACKEND"))
+    passed = await run_soak(
+        worker,
+        plan,
+        iterations=args.iterations,
+        sample_every=args.sample_every,
+        warmup=args.warmup,
+        timeout=args.timeout or get_workflow_timeout(),
+        limits=limits,
+        reload_every=args.reload_every
+    )
+    if passed:
+        logger.info("🎉 Soak passed")
+    return passed
+
+
+def get_workflow_timeout() -> int:
+    return int(os.getenv("WORKFLOW_TIMEOUT", "300"))
+
+
+def report_result(success: bool, result: str) -> None:
+    if success:
+        logger.info("🎉 Workflow completed successfully!")
+        logger.info("📋 Final result: %s", result)
+    else:
+        logger.error("💥 Workflow failed: %s", result)
+
+    if metrics.snapshot():
+        logger.info("📊 Metrics: %s", metrics.summary())
+
+
+def profile_workflow(args: argparse.Namespace, name: str):
+    """Sample the event loop's stacks for one workflow when --profile-sample is on."""
+    return sample_stacks(name) if args.profile_sample else contextlib.nullcontext()
+
+
+async def watch_workflow(worker: GrpcWorkerAgentRuntime, args: argparse.Namespace) -> None:
+    """Reload agents affected by config or generated code changes and re-run the workflow."""
+    logger.info("👀 Watching %s for changes (Ctrl+C to stop)", ", ".join(WATCH_PATTERNS))
+
+    async for changed in watch_files(WATCH_PATTERNS):
+        logger.info("🔄 Detected changes in: %s", ", ".join(sorted(changed)))
+        try:
+            plan = Creator.load_plan(CONFIG_PATH)
+        except PlanError as e:
+            logger.error("💥 Invalid configuration, keeping current agents: %s", e)
+            continue
+
+        with profile_workflow(args, f"workflow-{plan.plan_id[:12]}"):
+            outcome = await run_workflow(worker, plan.plan_id)
+        if outcome is not None:
+            report_result(*outcome)
+
+
+async def main(args: Optional[argparse.Namespace] = None) -> int:
+    args = args or parse_args([])
     load_dotenv(override=True)
     workflow_state.reset()
+    if args.command == "soak":
+        # Soak offline unless a backend was chosen explicitly
+        os.environ.setdefault("MODEL_BACKEND", "fake")
+    exit_code = 0
     
     debug_mode = os.getenv("DEBUG", "false").lower() in ("true", "1", "yes")
+    json_logs = os.getenv("LOG_FORMAT", "text").lower() == "json"
     if debug_mode:
-        setup_logging(logging.DEBUG)
+        setup_logging(logging.DEBUG, json_output=json_logs)
         logger.info("🐛 Debug mode enabled")
     else:
-        setup_logging(logging.INFO)
+        setup_logging(logging.INFO, json_output=json_logs)
     
     logger.info("🚀 Starting Agent Core")
     host = GrpcWorkerAgentRuntimeHost(address="localhost:50051")
     worker = GrpcWorkerAgentRuntime(host_address="localhost:50051")
+    loop_monitor = LoopMonitor() if args.profile or args.profile_sample else None
 
     try:
+        if loop_monitor is not None:
+            loop_monitor.start()
+            logger.info("⏱️ Profiling: monitoring event loop lag")
+
         host.start()
         await worker.start()
 
         logger.info("Registering Creator agent")
         await Creator.register(worker, "Creator", lambda: Creator("Creator"))
-        creator_id = AgentId("Creator", "default")
 
         logger.info("Registering Start agent")
         await Start.register(worker, "Start", lambda: Start("Start"))
@@ -44,51 +193,116 @@ async def main() -> None:
         logger.info("Registering End agent")
         await End.register(worker, "End", lambda: End("End"))
 
-        with open("config/agents.yaml", "r") as f:
-            spec = yaml.safe_load(f)
-
-        content = yaml.safe_dump(spec)
-
         # Allow time for agent registration to complete
         await asyncio.sleep(1)
 
-        logger.info("Sending message to Creator")
-        await worker.send_message(utils.Message(content=content, sender="Host"), creator_id)
-        
-        timeout_seconds = int(os.getenv("WORKFLOW_TIMEOUT", "300"))
-        
         try:
-            success, result = await asyncio.wait_for(
-                workflow_state.wait_for_completion(), 
-                timeout=timeout_seconds
-            )
-        except asyncio.TimeoutError:
-            timeout_minutes = timeout_seconds // 60
-            logger.error(f"❌ Workflow timed out after {timeout_minutes} minutes")
-            success, result = False, f"Workflow timed out after {timeout_minutes} minutes"
-        
-        if success:
-            logger.info(f"🎉 Workflow completed successfully!")
-            logger.info(f"📋 Final result: {result}")
-        else:
-            logger.error(f"💥 Workflow failed: {result}")
+            plan = Creator.load_plan(args.config if args.command == "soak" else CONFIG_PATH)
+        except PlanError as e:
+            logger.error("💥 Workflow failed: %s", e)
+            plan = None
+
+        if args.command == "batch":
+            if plan is not None:
+                with profile_workflow(args, f"batch-{plan.plan_id[:12]}"):
+                    await batch_workflow(worker, plan, args)
+            return exit_code
+
+        if args.command == "soak":
+            passed = False
+            if plan is not None:
+                with profile_workflow(args, f"soak-{plan.plan_id[:12]}"):
+                    passed = await soak_workflow(worker, plan, args)
+            exit_code = 0 if passed else 1
+            return exit_code
+
+        if plan is not None:
+            with profile_workflow(args, f"workflow-{plan.plan_id[:12]}"):
+                outcome = await run_workflow(worker, plan.plan_id)
+            if outcome is not None:
+                report_result(*outcome)
+
+        if args.watch:
+            await watch_workflow(worker, args)
             
     except Exception as e:
-        logger.error(f"Main process error: {e}")
+        logger.error("Main process error: %s", e)
 
     finally:
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+            logger.info("⏱️ Event loop lag: %s", loop_monitor.summary())
+
         logger.info("Stopping worker and host cleanly")
         try:
             await worker.stop()
         except Exception as e:
-            logger.error(f"Error stopping worker: {e}")
+            logger.error("Error stopping worker: %s", e)
         
         try:
             await host.stop()
         except Exception as e:
-            logger.error(f"Error stopping host: {e}")
+            logger.error("Error stopping host: %s", e)
 
+    return exit_code
 
-if __name__ == "__main__":
-    asyncio.run(main())
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="agent-core", description="Generate and run an Agent Core workflow")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and hot reload agents when config/agents.yaml or generated/*.py change"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="measure event loop lag and log the loop thread's stack whenever it is blocked"
+    )
+    parser.add_argument(
+        "--profile-sample",
+        action="store_true",
+        help="also sample the event loop's stacks and write a collapsed-stack (flamegraph) file per workflow"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="run the workflow over every input in a JSONL file")
+    batch_parser.add_argument("inputs", help="JSONL file with one input per line (a string or an object with an 'input' field)")
+    batch_parser.add_argument("--out", default="results.jsonl", help="JSONL file results are appended to; existing results are skipped on resume")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="number of inputs processed at once (default: 4)")
+    batch_parser.add_argument("--timeout", type=float, default=None, help="per-input timeout in seconds (default: WORKFLOW_TIMEOUT)")
+
+    soak_parser = subparsers.add_parser("soak", help="run a workflow repeatedly against a fake model and fail on resource growth")
+    soak_parser.add_argument("--config", default="config/soak.yaml", help="workflow to soak (default: config/soak.yaml)")
+    soak_parser.add_argument("--iterations", type=int, default=1000, help="number of workflow runs (default: 1000)")
+    soak_parser.add_argument("--warmup", type=int, default=20, help="runs before the baseline sample is taken (default: 20)")
+    soak_parser.add_argument("--sample-every", type=int, default=100, help="log a resource sample every N runs (default: 100)")
+    soak_parser.add_argument("--reload-every", type=int, default=0, help="hot reload the generated agents every N runs (default: never)")
+    soak_parser.add_argument("--timeout", type=float, default=None, help="per-run timeout in seconds (default: WORKFLOW_TIMEOUT)")
+    soak_parser.add_argument("--max-memory-growth", type=float, default=20.0, help="allowed growth of traced memory in MB (default: 20)")
+    soak_parser.add_argument("--max-fd-growth", type=int, default=10, help="allowed growth of open file descriptors (default: 10)")
+    soak_parser.add_argument("--max-process-growth", type=int, default=2, help="allowed growth of child processes (default: 2)")
+    soak_parser.add_argument("--max-task-growth", type=int, default=10, help="allowed growth of asyncio tasks (default: 10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch" and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.command == "soak" and not 0 < args.warmup < args.iterations:
+        parser.error("--warmup must be at least 1 and smaller than --iterations")
+    return args
+
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    exit_code = 0
+    try:
+        exit_code = asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
     logger.info("Main process completed")
+    if exit_code:
+        sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,28 +1,41 @@
 import os
-import sys
-import importlib
 import logging
-import json
+import hashlib
+import copy
 from autogen_core import MessageContext, RoutedAgent, message_handler, TRACE_LOGGER_NAME, AgentId
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from src.utils import utils
 import yaml
 import re
 from src.utils.prompts import Prompts
+from src.utils.hedging import HEDGE_OPTIONS
+from src.utils.memory import MEMORY_POLICIES
+from src.utils.loader import compile_source, load_module
+from src.utils.runtime import agent_registry, retire_agents
+from src.agents.router import ROUTER_KIND, Router
+from src.utils.plan import AgentPlan, PlanError, RoutePlan, WorkflowPlan, get_plan, hash_config, read_cached_plan, register_plan, write_cached_plan
+from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger("main")
 
+AGENT_TEMPLATE_FILE = "src/templates/agent.py"
+TOOLS_TEMPLATE_FILE = "src/templates/agent_with_tools.py"
+ROUTE_CONDITIONS = ("min_length", "max_length", "regex", "field")
+
 
 
 class Creator(RoutedAgent):
+    UNCHANGED = "unchanged"
 
     def __init__(self, name) -> None:
         super().__init__(name)
         system_message = Prompts.get_creator_system_message()
-        model_client = OpenAIChatCompletionClient(model=utils.MODEL_NAME, model_info=utils.GEMINI_INFO, api_key=os.getenv("GOOGLE_API_KEY"))
+        model_client = utils.create_model_client()
         self._delegate = AssistantAgent(name, model_client=model_client, system_message=system_message)
+        # Agents registered on the runtime, with the plan and source hash they were loaded from
+        self._loaded: Dict[str, Tuple[AgentPlan, str]] = {}
+        self._plan_id: Optional[str] = None
 
     def get_generation_prompt(self, description: str, system_message: str, template_file: str) -> str:
         prompt = Prompts.get_creator_prompt(description, system_message)
@@ -34,58 +47,45 @@ class Creator(RoutedAgent):
 
     @message_handler
     async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
-        logger.debug(f"Creator received message: {message.content}")
-        
-        try:
-            config = yaml.safe_load(message.content)
-        except yaml.YAMLError as e:
-            await self.send_message(utils.Message(content=f"YAML parse error: {e}", sender="Creator"), AgentId("End", "default"))
-            return utils.Message(content="", sender="Creator")
-        
-        if "agents" not in config or not isinstance(config["agents"], list):
-            await self.send_message(utils.Message(content="Error: YAML must have a top-level 'agents' list.", sender="Creator"), AgentId("End", "default"))
-            return utils.Message(content="", sender="Creator")
+        plan = get_plan(message.plan_id)
+        if plan is None:
+            logger.debug("Creator received raw configuration: %s", message.content)
+            try:
+                plan = Creator.compile_config(message.content)
+            except PlanError as e:
+                return await self._fail(message, str(e))
+        else:
+            logger.debug("Creator received workflow plan %s", plan.plan_id)
 
-        agents = config.get("agents", [])
-        workflow_config = config.get("workflow_config", {})
-        all_errors = []
+        all_errors = list(plan.errors)
         registered_agents = {}
-
-        workflow_error = Creator.validate_workflow(agents)
-
-        if workflow_error:
-            await self.send_message(utils.Message(content=f"❌ Workflow validation errors:\n{workflow_error}", sender="Creator"), AgentId("End", "default"))
-            return utils.Message(content="", sender="Creator")
-
-        if not agents:
-            await self.send_message(utils.Message(content="❌ No agents specified in the configuration", sender="Creator"), AgentId("End", "default"))
-            return utils.Message(content="", sender="Creator")
-
-        for i, spec in enumerate(agents): 
-            errors = Creator.validate_agent_spec(spec)
-            if errors:
-                all_errors.append(f"Agent {i} ({spec.get('agent_name', 'unknown')}):\n" + "\n".join(errors))
+        changed_agents = []
+
+        for agent in plan.agents:
+            filename = agent.filename
+            agent_name = agent.agent_name
+            module_path = agent.module_path
+            template_file = agent.template_file
+
+            if agent.kind == ROUTER_KIND:
+                if await self._load_router(agent, all_errors):
+                    changed_agents.append(agent_name)
+                if agent_name in self._loaded:
+                    registered_agents[agent_name] = agent
                 continue
-            
-            filename = spec.get("filename", "generated/new_agent.py")
-            agent_name = spec.get("agent_name", os.path.splitext(os.path.basename(filename))[0])
-            module_path = f"generated.{agent_name}"
-            description = spec.get("description", "An AI agent.")
-            system_message = spec.get("system_message", "You are an AI agent.")
-
-            if "tools" in spec and spec["tools"]:
-                template_file = "src/templates/agent_with_tools.py"
-            else:
-                template_file = "src/templates/agent.py"
 
             if os.path.exists(filename) and not self.should_regenerate(filename, template_file):
-                logger.debug(f"Agent file {filename} already exists, skipping generation")
+                logger.debug("Agent file %s already exists, skipping generation", filename)
+                with open(filename, "r", encoding="utf-8") as f:
+                    source = f.read()
             else:
                 text_message = TextMessage(
-                    content=self.get_generation_prompt(description, system_message, template_file),
+                    content=self.get_generation_prompt(agent.description, agent.system_message, template_file),
                     source="user"
                 )
 
+                # Each generation is independent, don't resend earlier prompts and templates
+                await self._delegate.on_reset(ctx.cancellation_token)
                 response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
 
                 generated_code = response.chat_message.content
@@ -99,107 +99,347 @@ class Creator(RoutedAgent):
                 
                 security_issues = Creator.validate_generated_code(generated_code)
                 if security_issues:
-                    logger.error(f"Generated code failed security validation: {security_issues}")
-                    await self.send_message(utils.Message(content=f"Security validation failed: {security_issues}", sender="Creator"), AgentId("End", "default"))
-                    return utils.Message(content="", sender="Creator")
+                    logger.error("Generated code failed security validation: %s", security_issues)
+                    return await self._fail(message, f"Security validation failed: {security_issues}")
                 
                 try:
-                    compile(generated_code, filename, 'exec')
+                    compile_source(filename, generated_code)
                 except SyntaxError as e:
-                    logger.error(f"Generated code has syntax errors: {e}")
-                    await self.send_message(utils.Message(content=f"Syntax error in generated code: {e}", sender="Creator"), AgentId("End", "default"))
-                    return utils.Message(content="", sender="Creator")
+                    logger.error("Generated code has syntax errors: %s", e)
+                    return await self._fail(message, f"Syntax error in generated code: {e}")
 
                 os.makedirs(os.path.dirname(filename), exist_ok=True)
 
+                # The file persists the generated code across restarts, modules are built from the string
                 with open(filename, "w", encoding="utf-8") as f:
                     f.write(generated_code)
-                logger.debug(f"Saved generated agent code to {filename}")
+                logger.debug("Saved generated agent code to %s", filename)
+                source = generated_code
+
+            source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+            previous = self._loaded.get(agent_name)
+            if previous == (agent, source_hash):
+                logger.debug("Agent %s is unchanged, keeping live instances", agent_name)
+                registered_agents[agent_name] = agent
+                continue
 
             try:
-                if module_path in sys.modules:
-                    module_file = sys.modules[module_path].__file__
-                    if module_file and os.path.exists(module_file):
-                        module_mtime = os.path.getmtime(module_file)
-                        current_mtime = os.path.getmtime(filename)
-                        if current_mtime > module_mtime:
-                            logger.info(f"File {filename} modified, reloading module {module_path}")
-                            importlib.reload(sys.modules[module_path])
-                        else:
-                            logger.debug(f"Module {module_path} is up to date, skipping reload")
-                    else:
-                        logger.info(f"Reloading module {module_path} (no file info)")
-                        importlib.reload(sys.modules[module_path])
-                module = importlib.import_module(module_path)
+                if previous is not None and previous[1] != source_hash:
+                    logger.info("File %s modified, reloading module %s", filename, module_path)
+                module = load_module(module_path, filename, source)
             except Exception as e:
-                logger.error(f"Failed to import/reload module {module_path}: {e}")
-                await self.send_message(utils.Message(content=f"Error importing {agent_name}: {e}", sender="Creator"), AgentId("End", "default"))
-                return utils.Message(content="", sender="Creator")
+                logger.error("Failed to import/reload module %s: %s", module_path, e)
+                return await self._fail(message, f"Error importing {agent_name}: {e}")
 
             try:
-                logger.debug(f"Registering agent {agent_name}")
-                await module.Agent.register(self.runtime, agent_name, Creator.create_agent(module, agent_name, system_message, spec))
-                logger.debug(f"Agent {agent_name} registered and live")  
+                factory = Creator.create_agent(module, agent_name, agent.system_message, agent.spec)
+                await self._register(module.Agent, agent_name, factory, agent.timeout)
             except Exception as e:
-                logger.error(f"Failed to register agent {agent_name}: {e}")
+                logger.error("Failed to register agent %s: %s", agent_name, e)
                 all_errors.append(f"{agent_name}: Failed to register -> {e}")
                 continue
             
-            registered_agents[agent_name] = spec
+            self._loaded[agent_name] = (agent, source_hash)
+            changed_agents.append(agent_name)
+            registered_agents[agent_name] = agent
         
+        removed_agents = [name for name in self._loaded if not plan.get_agent(name)]
+        for agent_name in removed_agents:
+            logger.info("Agent %s removed from the workflow, it will no longer receive messages", agent_name)
+            del self._loaded[agent_name]
+
+        if message.run_id and not changed_agents and not all_errors and plan.plan_id == self._plan_id:
+            logger.info("No agents changed, skipping workflow run")
+            return utils.Message(content=Creator.UNCHANGED, sender="Creator")
+        self._plan_id = plan.plan_id
+
         if not registered_agents:
-            await self.send_message(utils.Message(content="❌ No agents were successfully registered", sender="Creator"), AgentId("End", "default"))
-            return utils.Message(content="", sender="Creator")
+            return await self._fail(message, "❌ No agents were successfully registered")
 
-        head_agent = agents[0]
-        test_message = head_agent.get('test_message')
-        if not test_message:
-            await self.send_message(utils.Message(content="❌ Head agent has no test_message specified", sender="Creator"), AgentId("End", "default"))
+        if plan.head_agent not in registered_agents:
+            return await self._fail(message, f"❌ Head agent '{plan.head_agent}' not found in registered agents")
+
+        if not message.run_id:
+            if all_errors:
+                logger.error("❌ Errors encountered:\n" + "\n".join(all_errors))
+            logger.info("✅ Workflow prepared:\n%s", self._generate_workflow_progress(plan, registered_agents))
             return utils.Message(content="", sender="Creator")
+
+        if not plan.test_message:
+            return await self._fail(message, "❌ Head agent has no test_message specified")
             
-        workflow_progress = self._generate_workflow_progress(agents, registered_agents)
-        logger.info(f"🚀 Starting workflow:\n{workflow_progress}")
+        workflow_progress = self._generate_workflow_progress(plan, registered_agents)
+        logger.info("🚀 Starting workflow:\n%s", workflow_progress)
         
-        # Create workflow specification for Start agent
-        workflow_spec = {
-            "agents": registered_agents,
-            "head_agent": head_agent,
-            "workflow_config": {
-                "input_mode": workflow_config.get("input_mode", "test_message"),
-                "input_prompt": workflow_config.get("input_prompt", "What would you like me to help you with?")
-            }
-        }
-        
-        logger.debug(f"Workflow will start with agent {head_agent.get('agent_name')}")
+        logger.debug("Workflow will start with agent %s", plan.head_agent)
         try:
-            await self.send_message(utils.Message(content=json.dumps(workflow_spec), sender="Creator"), AgentId("Start", "default"))
+            await self.send_message(utils.Message(content="", sender="Creator", plan_id=plan.plan_id, run_id=message.run_id, deadline=message.deadline), AgentId("Start", "default"))
         except Exception as e:
-            logger.error(f"❌ Creator: Failed to send workflow spec to Start agent: {e}")
+            logger.error("❌ Creator: Failed to send workflow plan to Start agent: %s", e)
             await self.send_message(
-                utils.Message(content=f"❌ Failed to start workflow: {e}", sender="Creator"), 
+                utils.Message(content=f"❌ Failed to start workflow: {e}", sender="Creator", run_id=message.run_id), 
                 AgentId("End", "default")
             )
 
         if all_errors:
             await self.send_message(
-                utils.Message(content="❌ Errors encountered:\n" + "\n".join(all_errors), sender="Creator"),
+                utils.Message(content="❌ Errors encountered:\n" + "\n".join(all_errors), sender="Creator", run_id=message.run_id),
                 AgentId("End", "default")
             )
         
 
         return utils.Message(content="", sender="Creator") 
+
+    async def _load_router(self, agent: AgentPlan, errors: list) -> bool:
+        """Register a built-in router, no code is generated for it. Returns True if it was (re)registered."""
+        previous = self._loaded.get(agent.agent_name)
+        if previous == (agent, ""):
+            logger.debug("Router %s is unchanged, keeping live instances", agent.agent_name)
+            return False
+
+        try:
+            await self._register(Router, agent.agent_name, lambda: Router(agent), agent.timeout)
+        except Exception as e:
+            logger.error("Failed to register router %s: %s", agent.agent_name, e)
+            errors.append(f"{agent.agent_name}: Failed to register -> {e}")
+            return False
+
+        self._loaded[agent.agent_name] = (agent, "")
+        return True
+
+    async def _fail(self, message: utils.Message, error: str) -> utils.Message:
+        """Report an error to End for the run being started and return it to the caller."""
+        if message.run_id:
+            await self.send_message(utils.Message(content=error, sender="Creator", run_id=message.run_id), AgentId("End", "default"))
+        else:
+            logger.error(error)
+        return utils.Message(content=error, sender="Creator")
+
+    @staticmethod
+    def load_plan(config_path: str) -> WorkflowPlan:
+        """Return the compiled plan for a config file, reusing the on-disk cache when the file is unchanged."""
+        with open(config_path, "rb") as f:
+            raw = f.read()
+
+        plan_id = hash_config(raw)
+        plan = get_plan(plan_id) or read_cached_plan(plan_id)
+        if plan is not None:
+            logger.debug("Using cached workflow plan %s for %s", plan_id[:12], config_path)
+            register_plan(plan)
+            return plan
+
+        plan = Creator.compile_config(raw, plan_id)
+        write_cached_plan(plan)
+        logger.debug("Compiled workflow plan %s for %s", plan_id[:12], config_path)
+        return plan
+
+    @staticmethod
+    def compile_config(raw, plan_id: Optional[str] = None) -> WorkflowPlan:
+        """Parse a YAML configuration and compile it into a registered plan. Raises PlanError."""
+        if plan_id is None:
+            plan_id = hash_config(raw.encode("utf-8") if isinstance(raw, str) else raw)
+
+        try:
+            config = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise PlanError(f"YAML parse error: {e}")
+
+        plan = Creator.compile_plan(config, plan_id)
+        register_plan(plan)
+        return plan
+
+    @staticmethod
+    def compile_plan(config, plan_id: str) -> WorkflowPlan:
+        """Validate a parsed configuration and resolve routing, templates and module paths."""
+        if not isinstance(config, dict) or not isinstance(config.get("agents"), list):
+            raise PlanError("Error: YAML must have a top-level 'agents' list.")
+
+        agents = config["agents"]
+        workflow_config = config.get("workflow_config") or {}
+
+        structure_errors = Creator.validate_structure(agents, workflow_config)
+        if structure_errors:
+            raise PlanError("❌ Malformed configuration:\n" + "\n".join(structure_errors))
+
+        workflow_errors = Creator.validate_workflow(agents)
+        if workflow_errors:
+            raise PlanError("❌ Workflow validation errors:\n" + "\n".join(workflow_errors))
+
+        if not agents:
+            raise PlanError("❌ No agents specified in the configuration")
+
+        errors = []
+        agent_plans = []
+        for i, spec in enumerate(agents):
+            spec_errors = Creator.validate_agent_spec(spec)
+            if spec_errors:
+                errors.append(f"Agent {i} ({spec.get('agent_name', 'unknown')}):\n" + "\n".join(spec_errors))
+                continue
+
+            if spec.get("type") == ROUTER_KIND:
+                agent_plans.append(Creator.compile_router(spec))
+                continue
+
+            filename = spec.get("filename", "generated/new_agent.py")
+            agent_name = spec.get("agent_name", os.path.splitext(os.path.basename(filename))[0])
+            tools = spec.get("tools") or []
+
+            agent_plans.append(AgentPlan(
+                agent_name=agent_name,
+                filename=filename,
+                module_path=f"generated.{agent_name}",
+                template_file=TOOLS_TEMPLATE_FILE if tools else AGENT_TEMPLATE_FILE,
+                description=spec.get("description", "An AI agent."),
+                system_message=spec.get("system_message", "You are an AI agent."),
+                timeout=spec.get("timeout", 30),
+                output_to=spec.get("output_to"),
+                spec=spec
+            ))
+
+        head_agent = agents[0]
+        return WorkflowPlan(
+            plan_id=plan_id,
+            agents=agent_plans,
+            head_agent=head_agent.get("agent_name"),
+            test_message=head_agent.get("test_message"),
+            route=Creator.resolve_route(agents),
+            input_mode=workflow_config.get("input_mode", "test_message"),
+            input_prompt=workflow_config.get("input_prompt", "What would you like me to help you with?"),
+            input_timeout=workflow_config.get("input_timeout", 30.0),
+            coalesce=bool(workflow_config.get("coalesce", False)),
+            errors=errors
+        )
+
+    @staticmethod
+    def compile_router(spec: dict) -> AgentPlan:
+        """Build the plan of a router node from a spec already checked by validate_workflow."""
+        routes = [
+            RoutePlan(
+                output_to=route["output_to"],
+                min_length=route.get("min_length"),
+                max_length=route.get("max_length"),
+                pattern=re.compile(route["regex"]) if route.get("regex") else None,
+                field=route.get("field"),
+                equals=route.get("equals"),
+                check_equals="equals" in route
+            )
+            for route in spec["routes"]
+        ]
+        return AgentPlan(
+            agent_name=spec["agent_name"],
+            filename="",
+            module_path="",
+            template_file="",
+            description=spec.get("description", "Rule-based router"),
+            system_message="",
+            timeout=spec.get("timeout", 30),
+            output_to=spec.get("output_to"),
+            spec=spec,
+            kind=ROUTER_KIND,
+            routes=routes
+        )
+
+    @staticmethod
+    def resolve_route(agents) -> list[str]:
+        """Follow output_to links from the head agent and return the agent names in order.
+
+        Agents reachable only through a router branch follow the default path, each branch
+        as its own chain of output_to links.
+        """
+        by_name = {a.get("agent_name"): a for a in agents}
+        route = []
+        pending = agents[:1]
+
+        while pending:
+            current_agent = pending.pop(0)
+            while current_agent and current_agent.get("agent_name") not in route:
+                route.append(current_agent.get("agent_name"))
+                if current_agent.get("type") == ROUTER_KIND:
+                    pending.extend(by_name.get(r.get("output_to")) for r in current_agent.get("routes") or [] if isinstance(r, dict))
+                current_agent = by_name.get(current_agent.get("output_to"))
+
+        return route
     
+    @staticmethod
+    def validate_structure(agents: list, workflow_config) -> list[str]:
+        """Check the shape of the config before anything reads it as mappings. Return a list of error messages."""
+        if not isinstance(workflow_config, dict):
+            return ["workflow_config must be a mapping"]
+
+        errors = []
+        for i, spec in enumerate(agents):
+            if not isinstance(spec, dict):
+                errors.append(f"Agent {i} must be a mapping, got {type(spec).__name__}: {spec!r}")
+                continue
+            tools = spec.get("tools")
+            if tools is None:
+                continue
+            if not isinstance(tools, list):
+                errors.append(f"Agent {i} ({spec.get('agent_name', 'unknown')}): tools must be a list")
+                continue
+            for j, tool in enumerate(tools):
+                if not isinstance(tool, dict):
+                    errors.append(f"Agent {i} ({spec.get('agent_name', 'unknown')}): tool {j} must be a mapping, got {type(tool).__name__}: {tool!r}")
+                elif not isinstance(tool.get("params", {}), dict) or not isinstance(tool.get("params", {}).get("env", {}), dict):
+                    errors.append(f"Agent {i} ({spec.get('agent_name', 'unknown')}): tool {tool.get('name', j)} params and params.env must be mappings")
+        return errors
+
     @staticmethod
     def validate_agent_spec(spec: dict) -> list[str]:
         """Validate a single agent spec. Return a list of error messages."""
     
         errors = []
-        required_fields = ["agent_name", "description", "system_message"]
+        # Routers are built in, they have no prompt to generate code from
+        required_fields = ["agent_name"] if spec.get("type") == ROUTER_KIND else ["agent_name", "description", "system_message"]
 
         for field in required_fields:
             if field not in spec or not spec[field]:
                 errors.append(f"Missing required field: {field}")
 
+        memory = spec.get("memory")
+        if memory is not None:
+            if not isinstance(memory, dict):
+                errors.append("memory must be a mapping")
+            else:
+                if memory.get("policy", "unbounded") not in MEMORY_POLICIES:
+                    errors.append(f"Unknown memory policy: {memory.get('policy')} (expected one of {', '.join(MEMORY_POLICIES)})")
+                for field in ("turns", "max_tokens"):
+                    value = memory.get(field)
+                    if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+                        errors.append(f"memory.{field} must be a positive integer")
+                if not isinstance(memory.get("reset_per_run", True), bool):
+                    errors.append("memory.reset_per_run must be true or false")
+
+        fallback_model = spec.get("fallback_model")
+        if fallback_model is not None and (not isinstance(fallback_model, str) or not fallback_model.strip()):
+            errors.append("fallback_model must be a model name")
+
+        errors.extend(Creator.validate_hedge(spec.get("hedge")))
+
+        max_parallel_tools = spec.get("max_parallel_tools")
+        if max_parallel_tools is not None and (not isinstance(max_parallel_tools, int) or max_parallel_tools < 1):
+            errors.append("max_parallel_tools must be a positive integer")
+
+        tool_timeout = spec.get("tool_timeout")
+        if tool_timeout is not None and (not isinstance(tool_timeout, (int, float)) or tool_timeout <= 0):
+            errors.append("tool_timeout must be a positive number of seconds")
+
+        for tool in spec.get("tools") or []:
+            tool_name = tool.get("name", "unknown")
+            timeout = tool.get("timeout")
+            if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+                errors.append(f"Tool {tool_name}: timeout must be a positive number of seconds")
+            timeouts = tool.get("timeouts")
+            if timeouts is None:
+                continue
+            if not isinstance(timeouts, dict):
+                errors.append(f"Tool {tool_name}: timeouts must map tool names to seconds")
+                continue
+            for name, value in timeouts.items():
+                if not isinstance(value, (int, float)) or value <= 0:
+                    errors.append(f"Tool {tool_name}: timeout for {name} must be a positive number of seconds")
+
         return errors
     
     @staticmethod
@@ -211,14 +451,121 @@ class Creator(RoutedAgent):
         for spec in agents:
             output_to = spec.get("output_to")
 
-            if output_to and output_to not in agent_names:
+            if output_to and output_to != "End" and output_to not in agent_names:
                 errors.append(f"Agent {spec.get('agent_name')} references non-existent agent: {output_to}")
+
+            kind = spec.get("type", "agent")
+            if kind == ROUTER_KIND:
+                errors.extend(Creator.validate_routes(spec, agent_names))
+            elif kind != "agent":
+                errors.append(f"Agent {spec.get('agent_name')} has unknown type: {kind} (expected agent or {ROUTER_KIND})")
         
         return errors
+
+    @staticmethod
+    def validate_hedge(hedge) -> list[str]:
+        """Validate an agent's hedge setting, true/false or a mapping of options. Return a list of error messages."""
+        if hedge is None or isinstance(hedge, bool):
+            return []
+        if not isinstance(hedge, dict):
+            return ["hedge must be true, false or a mapping"]
+
+        errors = []
+        for key, value in hedge.items():
+            if key not in HEDGE_OPTIONS:
+                errors.append(f"Unknown hedge option: {key} (expected one of {', '.join(HEDGE_OPTIONS)})")
+            elif key in ("min_samples", "window"):
+                if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                    errors.append(f"hedge.{key} must be a positive integer")
+            elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                errors.append(f"hedge.{key} must be a number")
+            elif key == "percentile" and not 0 < value <= 100:
+                errors.append("hedge.percentile must be between 0 and 100")
+            elif key != "percentile" and value < 0:
+                errors.append(f"hedge.{key} must not be negative")
+        return errors
+
+    @staticmethod
+    def validate_routes(spec: dict, agent_names: list) -> list[str]:
+        """Validate the rules of a router node. Return a list of error messages."""
+        name = spec.get("agent_name")
+        routes = spec.get("routes")
+        if not isinstance(routes, list) or not routes:
+            return [f"Router {name} needs a non-empty routes list"]
+
+        errors = []
+        for i, route in enumerate(routes):
+            prefix = f"Router {name} route {i}"
+            if not isinstance(route, dict):
+                errors.append(f"{prefix} must be a mapping")
+                continue
+
+            unknown = set(route) - set(ROUTE_CONDITIONS) - {"equals", "output_to"}
+            if unknown:
+                errors.append(f"{prefix} has unknown keys: {', '.join(sorted(unknown))}")
+
+            target = route.get("output_to")
+            if not target:
+                errors.append(f"{prefix} is missing output_to")
+            elif target != "End" and target not in agent_names:
+                errors.append(f"{prefix} references non-existent agent: {target}")
+
+            if not any(route.get(condition) is not None for condition in ROUTE_CONDITIONS):
+                errors.append(f"{prefix} has no condition, use the router's output_to for the default route")
+
+            for bound in ("min_length", "max_length"):
+                value = route.get(bound)
+                if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                    errors.append(f"{prefix} {bound} must be a non-negative integer")
+
+            pattern = route.get("regex")
+            if pattern is not None:
+                try:
+                    re.compile(pattern)
+                except (re.error, TypeError) as e:
+                    errors.append(f"{prefix} has an invalid regex {pattern!r}: {e}")
+
+            field = route.get("field")
+            if field is not None and (not isinstance(field, str) or not field):
+                errors.append(f"{prefix} field must be a dotted path such as result.status")
+            if "equals" in route and field is None:
+                errors.append(f"{prefix} uses equals without a field")
+
+        return errors
     
     @staticmethod
     def create_agent(module, agent_name, system_message, spec):
-        return lambda: module.Agent(agent_name, system_message, spec)
+        agent_class = module.Agent
+        return lambda: agent_class(agent_name, system_message, copy.deepcopy(spec))
+
+    async def _register(self, agent_class, agent_name: str, factory, drain_timeout: float) -> None:
+        """Register an agent type, or swap it in place if the runtime already has it.
+
+        The runtime is checked rather than self._loaded: an agent removed from the workflow
+        stays registered, so adding it back has to replace the old factory.
+        """
+        if agent_name in agent_registry(self.runtime)[0]:
+            logger.info("♻️ Re-registering agent %s", agent_name)
+            await self._replace_agent(agent_name, factory, drain_timeout)
+        else:
+            logger.debug("Registering agent %s", agent_name)
+            await agent_class.register(self.runtime, agent_name, factory)
+            logger.debug("Agent %s registered and live", agent_name)
+
+    async def _replace_agent(self, agent_name: str, factory, drain_timeout: float) -> None:
+        """Swap the factory of a registered agent type in place and retire its live instances.
+
+        New messages are served by instances of the new class straight away, while messages
+        already being handled by the old instances are drained before those are closed.
+        """
+        factories, instances = agent_registry(self.runtime)
+
+        async def factory_wrapper():
+            return factory()
+
+        factories[agent_name] = factory_wrapper
+        retired = [instances.pop(agent_id) for agent_id in list(instances) if agent_id.type == agent_name]
+        await retire_agents(retired, drain_timeout)
     
         
     def should_regenerate(self, filename, template_file) -> bool:
@@ -234,11 +581,11 @@ class Creator(RoutedAgent):
         current_version = re.search(r'TEMPLATE_VERSION = "([^"]+)"', template_content)
         
         if not current_version:
-            logger.warning(f"Template {template_file} missing TEMPLATE_VERSION, forcing regeneration")
+            logger.warning("Template %s missing TEMPLATE_VERSION, forcing regeneration", template_file)
             return True
         
         if not existing_version:
-            logger.info(f"Existing file {filename} missing TEMPLATE_VERSION, regenerating")
+            logger.info("Existing file %s missing TEMPLATE_VERSION, regenerating", filename)
             return True
         
         existing_version = existing_version.group(1)
@@ -246,7 +593,7 @@ class Creator(RoutedAgent):
         
         should_regenerate = existing_version != current_version
         if should_regenerate:
-            logger.info(f"Template version mismatch: {existing_version} -> {current_version}, regenerating")
+            logger.info("Template version mismatch: %s -> %s, regenerating", existing_version, current_version)
         
         return should_regenerate
     
@@ -284,38 +631,41 @@ class Creator(RoutedAgent):
         
         return issues
     
-    def _generate_workflow_progress(self, agents: list, registered_agents: dict) -> str:
+    def _generate_workflow_progress(self, plan: WorkflowPlan, registered_agents: dict) -> str:
         """Generate a visual representation of the workflow progress."""
-        if not agents:
+        if not plan.route:
             return "No agents configured"
         
-        workflow_chain = []
-        current_agent = agents[0]
+        # The default path first, then one line per chain reachable only through a router branch
+        chains = [[]]
+        previous = None
         
-        while current_agent:
-            agent_name = current_agent.get('agent_name', 'unknown')
+        for agent_name in plan.route:
+            agent = plan.get_agent(agent_name)
+            if previous is not None and previous.output_to != agent_name:
+                chains[-1].append(Creator._chain_end(previous))
+                chains.append([])
             status = "✓" if agent_name in registered_agents else "❌"
-            timeout = current_agent.get('timeout', 30)
-            has_tools = bool(current_agent.get('tools'))
             
             agent_info = f"[{status}] {agent_name}"
-            if has_tools:
-                tool_count = len(current_agent.get('tools', []))
-                agent_info += f" (🔧{tool_count} tools)"
-            agent_info += f" (⏱️{timeout}s)"
-            
-            workflow_chain.append(agent_info)
-            
-            output_to = current_agent.get('output_to')
-            if output_to:
-                next_agent = next((a for a in agents if a.get('agent_name') == output_to), None)
-                current_agent = next_agent
+            if agent and agent.kind == ROUTER_KIND:
+                branches = [route.describe() for route in agent.routes] + [f"else→{agent.output_to or 'End'}"]
+                agent_info += f" (🔀 {', '.join(branches)})"
             else:
-                current_agent = None
+                if agent and agent.spec.get("tools"):
+                    agent_info += f" (🔧{len(agent.spec['tools'])} tools)"
+                if agent:
+                    agent_info += f" (⏱️{agent.timeout}s)"
+            
+            chains[-1].append(agent_info)
+            previous = agent
         
-        workflow_chain.append("[⏳] End")
+        chains[-1].append(Creator._chain_end(previous))
         
-        return " → ".join(workflow_chain)
-
-
+        return "\n  ↳ ".join(" → ".join(chain) for chain in chains)
 
+    @staticmethod
+    def _chain_end(agent: Optional[AgentPlan]) -> str:
+        if agent is None or not agent.output_to or agent.output_to == "End":
+            return "[⏳] End"
+        return f"↩ {agent.output_to}"
@@ -12,9 +12,7 @@ class End(RoutedAgent):
 
     @message_handler
     async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
-        logger.debug(f"🏁 End: Received final message from {message.sender}")
-        logger.debug(f"🎉 Workflow completed successfully!")
-        logger.debug(f"📋 Final result: {message.content}")
-        workflow_state.set_completion(message.content)
+        logger.debug("🏁 End: Received final result from %s: %s", message.sender, message.content)
+        workflow_state.set_completion(message.content, message.run_id)
         
-        return utils.Message(content="", sender="End")
\ No newline at end of file
+        return utils.Message(content="", sender="End")
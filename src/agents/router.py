@@ -0,0 +1,83 @@
+from autogen_core import MessageContext, RoutedAgent, message_handler, AgentId
+from src.utils import utils
+from src.utils.metrics import metrics
+from src.utils.plan import AgentPlan, RoutePlan
+from workflow_state import workflow_state
+from dataclasses import replace
+from typing import Any, List
+import json
+import logging
+import re
+
+logger = logging.getLogger("main")
+
+ROUTER_KIND = "router"
+_MISSING = object()
+_CODE_FENCE = re.compile(r"^```\w*\n|\n?```$")
+
+
+def parse_json(content: str) -> Any:
+    """Parse JSON content, allowing the markdown code fence models often wrap it in."""
+    try:
+        return json.loads(_CODE_FENCE.sub("", content.strip()))
+    except ValueError:
+        return _MISSING
+
+
+def lookup_field(document: Any, path: str) -> Any:
+    """Resolve a dotted path such as ``result.items.0.title`` in parsed JSON. Returns _MISSING if absent."""
+    value = document
+    for key in path.split("."):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.lstrip("-").isdigit() and -len(value) <= int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return _MISSING
+    return value
+
+
+def matches(route: RoutePlan, content: str, document: Any) -> bool:
+    if route.min_length is not None and len(content) < route.min_length:
+        return False
+    if route.max_length is not None and len(content) > route.max_length:
+        return False
+    if route.pattern is not None and not route.pattern.search(content):
+        return False
+    if route.field is not None:
+        value = lookup_field(document, route.field)
+        if value is _MISSING or (route.check_equals and value != route.equals):
+            return False
+    return True
+
+
+def choose_route(routes: List[RoutePlan], default: str, content: str) -> str:
+    """Return the target of the first matching route, or ``default`` when none match."""
+    # Parse at most once, and only when some rule looks at JSON fields
+    document = parse_json(content) if any(route.field is not None for route in routes) else _MISSING
+    return next((route.output_to for route in routes if matches(route, content, document)), default)
+
+
+class Router(RoutedAgent):
+    """Built-in workflow node that picks the next agent from rules on the message content, without a model call."""
+
+    def __init__(self, plan: AgentPlan) -> None:
+        super().__init__(plan.description)
+        self._name = plan.agent_name
+        self._routes = plan.routes
+        self._default = plan.output_to or "End"
+
+    @message_handler
+    async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
+        run_token = workflow_state.get_cancellation_token(message.run_id)
+        if run_token is not None and run_token.is_cancelled():
+            logger.info("🛑 %s: Run %s was cancelled, dropping message", self._name, message.run_id)
+            return utils.Message(content="", sender=self._name)
+
+        output_to = choose_route(self._routes, self._default, message.content)
+        metrics.increment(f"router.{self._name}.{output_to}")
+        logger.info("🔀 %s: Routing to %s", self._name, output_to)
+
+        # Same agent key as the incoming message so concurrent runs keep their own chain of instances
+        await self.send_message(replace(message, sender=self._name), AgentId(output_to, self.id.key))
+        return utils.Message(content="", sender=self._name)
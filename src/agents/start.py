@@ -1,8 +1,8 @@
 from autogen_core import MessageContext, RoutedAgent, message_handler, AgentId
 from src.utils import utils
+from src.utils.plan import WorkflowPlan, get_plan
 from workflow_state import workflow_state
 import logging
-import json
 import asyncio
 
 logger = logging.getLogger("main")
@@ -14,95 +14,83 @@ class Start(RoutedAgent):
 
     @message_handler
     async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
-        logger.debug(f"🚀 Start: Received workflow spec from {message.sender}")
+        logger.debug("🚀 Start: Received workflow plan from %s", message.sender)
         
-        try:
-            workflow_spec = json.loads(message.content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Start: Failed to parse workflow spec: {e}")
-            workflow_state.set_error(f"Failed to parse workflow spec: {e}")
-            return utils.Message(content="", sender="Start")
-        
-        agents = workflow_spec.get("agents", [])
-        head_agent = workflow_spec.get("head_agent", {})
-        workflow_config = workflow_spec.get("workflow_config", {})
-        
-        if not agents or not head_agent:
-            error_msg = "Invalid workflow spec - missing agents or head_agent"
-            logger.error(f"Start: {error_msg}")
-            workflow_state.set_error(error_msg)
-            await self.send_message(
-                utils.Message(content=f"❌ {error_msg}", sender="Start"), 
-                AgentId("End", "default")
-            )
+        plan = get_plan(message.plan_id)
+        if plan is None:
+            error_msg = f"Unknown workflow plan: {message.plan_id}"
+            logger.error("Start: %s", error_msg)
+            workflow_state.set_error(error_msg, message.run_id)
             return utils.Message(content="", sender="Start")
         
-        # Validate that head agent is actually registered
-        head_agent_name = head_agent.get('agent_name')
-        if head_agent_name not in agents:
-            error_msg = f"Head agent '{head_agent_name}' not found in registered agents"
-            logger.error(f"Start: {error_msg}")
-            workflow_state.set_error(error_msg)
+        if not plan.agents or not plan.get_agent(plan.head_agent):
+            error_msg = "Invalid workflow plan - missing agents or head_agent"
+            logger.error("Start: %s", error_msg)
+            workflow_state.set_error(error_msg, message.run_id)
             await self.send_message(
-                utils.Message(content=f"❌ {error_msg}", sender="Start"), 
+                utils.Message(content=f"❌ {error_msg}", sender="Start", run_id=message.run_id), 
                 AgentId("End", "default")
             )
             return utils.Message(content="", sender="Start")
         
         # Determine input mode and get start message
-        input_mode = workflow_config.get("input_mode", "test_message")
-        
-        if input_mode == "interactive":
-            start_message = await self._get_interactive_input(workflow_config)
+        if message.content:
+            start_message = message.content
+        elif plan.input_mode == "interactive":
+            start_message = await self._get_interactive_input(plan)
         else:
-            start_message = head_agent.get('test_message', '')
+            start_message = plan.test_message or ''
         
         if not start_message:
             error_msg = "No start message available"
-            logger.error(f"Start: {error_msg}")
-            workflow_state.set_error(error_msg)
+            logger.error("Start: %s", error_msg)
+            workflow_state.set_error(error_msg, message.run_id)
             await self.send_message(
-                utils.Message(content=f"❌ {error_msg}", sender="Start"), 
+                utils.Message(content=f"❌ {error_msg}", sender="Start", run_id=message.run_id), 
                 AgentId("End", "default")
             )
             return utils.Message(content="", sender="Start")
         
+        if plan.coalesce and message.run_id and workflow_state.join_flight((plan.plan_id, start_message), message.run_id):
+            logger.info("🔗 Start: Run %s joined an identical run already in flight", message.run_id)
+            return utils.Message(content="", sender="Start")
+
         # Start the workflow
-        head_agent_name = head_agent.get('agent_name')
-        logger.info(f"🚀 Starting workflow with agent: {head_agent_name}")
-        logger.debug(f"🚀 Start message: {start_message}")
+        head_agent_name = plan.head_agent
+        logger.info("🚀 Starting workflow with agent: %s", head_agent_name)
+        logger.debug("🚀 Start message: %s", start_message)
         
         try:
             await self.send_message(
-                utils.Message(content=start_message, sender="Start"), 
-                AgentId(head_agent_name, "default")
+                utils.Message(content=start_message, sender="Start", plan_id=plan.plan_id, run_id=message.run_id, deadline=message.deadline), 
+                AgentId(head_agent_name, self.id.key)
             )
         except Exception as e:
             error_msg = f"Failed to send message to {head_agent_name}: {e}"
-            logger.error(f"❌ Start: {error_msg}")
-            workflow_state.set_error(error_msg)
+            logger.error("❌ Start: %s", error_msg)
+            workflow_state.set_error(error_msg, message.run_id)
             # Send error to End agent
             await self.send_message(
-                utils.Message(content=f"❌ Failed to start workflow: {e}", sender="Start"), 
+                utils.Message(content=f"❌ Failed to start workflow: {e}", sender="Start", run_id=message.run_id), 
                 AgentId("End", "default")
             )
             return utils.Message(content="", sender="Start")
         
         return utils.Message(content="", sender="Start")
     
-    async def _get_interactive_input(self, workflow_config: dict) -> str:
+    async def _get_interactive_input(self, plan: WorkflowPlan) -> str:
         """Get interactive input from user"""
-        input_prompt = workflow_config.get("input_prompt", "What would you like me to help you with?")
-        input_timeout = workflow_config.get("input_timeout", 30.0)
+        input_prompt = plan.input_prompt
+        input_timeout = plan.input_timeout
         
-        logger.info(f"🔄 Interactive mode: {input_prompt}")
+        logger.info("🔄 Interactive mode: %s", input_prompt)
         
         try:
             input_task = asyncio.create_task(self._collect_user_input(input_prompt))
             user_input = await asyncio.wait_for(input_task, timeout=input_timeout)
             
             if user_input and user_input.strip():
-                logger.info(f"✅ User input received: {user_input[:100]}{'...' if len(user_input) > 100 else ''}")
+                logger.info("✅ User input received: %s%s", user_input[:100], '...' if len(user_input) > 100 else '')
                 return user_input.strip()
             else:
                 logger.warning("⚠️ No user input received, using fallback message")
@@ -112,7 +100,7 @@ class Start(RoutedAgent):
             logger.warning("⏰ Input timeout - using fallback message")
             return "Input timeout - proceeding with default workflow"
         except Exception as e:
-            logger.error(f"❌ Error collecting input: {e}")
+            logger.error("❌ Error collecting input: %s", e)
             return "Error collecting input - proceeding with default workflow"
     
     async def _collect_user_input(self, prompt: str) -> str:
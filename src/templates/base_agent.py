@@ -1,12 +1,14 @@
 from autogen_core import MessageContext, RoutedAgent, message_handler, AgentId
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from src.utils import utils
-import os
+from src.utils.hedging import HedgedChatCompletionClient
+from src.utils.memory import create_model_context
+from workflow_state import workflow_state
 import logging
 import asyncio
 import time
+from dataclasses import replace
 from typing import Optional, List, Any
 
 logger = logging.getLogger("main")
@@ -22,22 +24,83 @@ class BaseAgent(RoutedAgent):
         self._delegate: Optional[AssistantAgent] = None
         self._timeout: int = spec.get('timeout', 30) if spec else 30
         self._last_activity: Optional[float] = None
+        self._memory: dict = self.spec.get("memory") or {}
+        self._run_id: Optional[str] = None
+        self._model_client: Optional[Any] = None
+        self._in_flight: int = 0
+        self._idle: asyncio.Event = asyncio.Event()
+        self._idle.set()
 
     async def _setup_delegate(self, tools: Optional[List[Any]] = None) -> None:
-        model_client = OpenAIChatCompletionClient(
-            model=utils.MODEL_NAME,
-            model_info=utils.GEMINI_INFO,
-            api_key=os.getenv("GOOGLE_API_KEY")
-        )
+        model_client = utils.create_model_client()
+
+        hedge = self.spec.get("hedge")
+        fallback_model = self.spec.get("fallback_model")
+        if hedge or fallback_model:
+            model_client = HedgedChatCompletionClient(
+                self._name,
+                model_client,
+                fallback=utils.create_model_client(fallback_model) if fallback_model else None,
+                hedge=hedge
+            )
         
+        self._model_client = model_client
         self._delegate = AssistantAgent(
             self._name,
             model_client=model_client,
             system_message=self._system_message,
             tools=tools or [],
-            reflect_on_tool_use=bool(tools)
+            reflect_on_tool_use=bool(tools),
+            model_context=create_model_context(self._memory, bool(tools))
         )
 
+    async def _prepare_memory(self, message: utils.Message, ctx: MessageContext) -> None:
+        """Clear the delegate's history when the memory policy says this message starts afresh."""
+        new_run = message.run_id != self._run_id
+        self._run_id = message.run_id
+
+        if self._memory.get("policy") == "stateless" or (new_run and self._memory.get("reset_per_run", True)):
+            await self._delegate.on_reset(ctx.cancellation_token)
+
+    def _link_run_cancellation(self, message: utils.Message, ctx: MessageContext) -> None:
+        """Cancel this message's work when its run is abandoned by the caller."""
+        run_token = workflow_state.get_cancellation_token(message.run_id)
+        if run_token is not None:
+            run_token.add_callback(ctx.cancellation_token.cancel)
+
+    def _effective_timeout(self, message: utils.Message) -> float:
+        """The agent timeout, capped by what is left of the run's deadline."""
+        if not message.deadline:
+            return self._timeout
+        return min(self._timeout, message.deadline - time.time())
+
+    async def _initialize(self) -> None:
+        """Create the delegate before the first message. Templates that need tools override this."""
+        await self._setup_delegate()
+
+    async def on_message_impl(self, message: Any, ctx: MessageContext) -> Any:
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            return await super().on_message_impl(message, ctx)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait for in-flight messages to finish. Returns False if the timeout expired first."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self) -> None:
+        if self._model_client is not None:
+            await self._model_client.close()
+            self._model_client = None
+
     def _get_error_context(self) -> str:
         context = []
         if hasattr(self, '_tools_specs') and self._tools_specs:
@@ -56,36 +119,56 @@ class BaseAgent(RoutedAgent):
         self._last_activity = time.time()
         
         if self._delegate is None:
-            await self._setup_delegate()
+            await self._initialize()
 
-        logger.debug(f"📨 {self._name}: Received message from {message.sender}")
+        logger.debug("📨 %s: Received message from %s", self._name, message.sender)
+        self._link_run_cancellation(message, ctx)
+        if ctx.cancellation_token.is_cancelled():
+            logger.info("🛑 %s: Run %s was cancelled, dropping message", self._name, message.run_id)
+            return utils.Message(content="", sender=self.spec.get("agent_name", "agent"))
+
+        timeout = self._effective_timeout(message)
+        if timeout <= 0:
+            # No budget left for this or any later hop, report straight to End
+            logger.error("⏰ %s: Run deadline already passed, skipping", self._name)
+            await self._forward(message, f"Agent {self._name} skipped: run deadline exceeded", output_to="End")
+            return utils.Message(content="", sender=self.spec.get("agent_name", "agent"))
+
+        await self._prepare_memory(message, ctx)
         text_message = TextMessage(content=message.content, source="user")
         
         try:
-            response = await asyncio.wait_for(
-                self._delegate.on_messages([text_message], ctx.cancellation_token),
-                timeout=self._timeout
-            )
+            task = asyncio.ensure_future(self._delegate.on_messages([text_message], ctx.cancellation_token))
+            ctx.cancellation_token.link_future(task)
+            response = await asyncio.wait_for(task, timeout=timeout)
             result_content = response.chat_message.content
-            logger.info(f"✅ {self._name}: Completed")
+            logger.info("✅ %s: Completed", self._name)
             
+        except asyncio.CancelledError:
+            if not ctx.cancellation_token.is_cancelled():
+                raise
+            logger.info("🛑 %s: Run %s was cancelled mid-call", self._name, message.run_id)
+            return utils.Message(content="", sender=self.spec.get("agent_name", "agent"))
+
         except asyncio.TimeoutError:
             last_activity = f"{time.time() - self._last_activity:.1f}s ago" if self._last_activity else "unknown"
-            result_content = f"Agent {self._name} timed out after {self._timeout}s. Last activity: {last_activity}. Context: {self._get_error_context()}"
-            logger.error(f"⏰ {self._name}: TIMEOUT after {self._timeout}s")
+            reason = f"timed out after {self._timeout}s" if timeout >= self._timeout else f"hit the run deadline after {timeout:.1f}s"
+            result_content = f"Agent {self._name} {reason}. Last activity: {last_activity}. Context: {self._get_error_context()}"
+            logger.error("⏰ %s: TIMEOUT after %.1fs", self._name, timeout)
             
         except Exception as e:
             result_content = f"Agent {self._name} failed: {str(e)}. Context: {self._get_error_context()}"
-            logger.error(f"❌ {self._name}: ERROR - {str(e)}")
-
-        result = utils.Message(content=result_content, sender=self.spec.get("agent_name", "agent"))
+            logger.error("❌ %s: ERROR - %s", self._name, str(e))
 
-        output_to = self.spec.get("output_to")
-        if output_to:
-            logger.debug(f"📤 {self._name}: Sending message to {output_to}")
-            await self.send_message(result, AgentId(output_to, "default"))
-        else:
-            logger.debug(f"📤 {self._name}: Sending message to End")
-            await self.send_message(result, AgentId("End", "default"))
+        await self._forward(message, result_content)
         
         return utils.Message(content="", sender=self.spec.get("agent_name", "agent"))
+
+    async def _forward(self, message: utils.Message, content: str, output_to: Optional[str] = None) -> None:
+        """Send a result to the next agent in the workflow, keeping the run context of the incoming message."""
+        result = replace(message, content=content, sender=self.spec.get("agent_name", "agent"))
+        output_to = output_to or self.spec.get("output_to") or "End"
+
+        # Stay on the same agent key so concurrent runs each get their own chain of instances
+        logger.debug("📤 %s: Sending message to %s", self._name, output_to)
+        await self.send_message(result, AgentId(output_to, self.id.key))
@@ -0,0 +1,183 @@
+from autogen_core import AgentId, AgentRuntime
+from src.utils import utils
+from src.utils.plan import WorkflowPlan
+from src.utils.runtime import agent_registry, retire_agents
+from workflow_state import workflow_state
+from typing import Iterator, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger("main")
+
+INPUT_FIELDS = ("input", "message", "content")
+CANCEL_GRACE_SECONDS = 5.0
+
+
+def load_completed(output_path: str) -> Set[int]:
+    """Return the input indexes already written to a results file.
+
+    A partially written last line (e.g. after a crash) is truncated so new results
+    can be appended cleanly.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    completed = set()
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                completed.add(int(json.loads(line)["index"]))
+            except (ValueError, KeyError, TypeError):
+                break
+            valid_bytes += len(line)
+
+    if valid_bytes < os.path.getsize(output_path):
+        logger.warning("Truncating incomplete results after byte %s in %s", valid_bytes, output_path)
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+
+    return completed
+
+
+def read_inputs(input_path: str) -> Iterator[Tuple[int, Optional[str], Optional[str], Optional[str]]]:
+    """Yield (index, id, input, error) for each non-blank line of a JSONL file.
+
+    Lines may be JSON strings or objects with an ``input`` (or ``message``/``content``)
+    field and an optional ``id``. The index is the zero-based line number.
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield index, None, None, f"Invalid JSON: {e}"
+                continue
+
+            if isinstance(record, str):
+                yield index, None, record, None
+            elif isinstance(record, dict):
+                text = next((record[field] for field in INPUT_FIELDS if isinstance(record.get(field), str)), None)
+                record_id = record.get("id")
+                yield index, str(record_id) if record_id is not None else None, text, None if text else "Missing input field"
+            else:
+                yield index, None, None, "Input must be a JSON string or object"
+
+
+async def run_one(runtime: AgentRuntime, plan: WorkflowPlan, text: str, key: str, timeout: float) -> Tuple[str, bool, str, bool]:
+    """Run a single input through the workflow on the given agent key. Returns (run_id, success, result, timed_out)."""
+    run_id = uuid.uuid4().hex
+    timed_out = False
+    workflow_state.start_run(run_id)
+
+    send = asyncio.create_task(runtime.send_message(
+        utils.Message(content=text, sender="Host", plan_id=plan.plan_id, run_id=run_id, deadline=time.time() + timeout),
+        AgentId("Start", key)
+    ))
+    try:
+        success, result = await asyncio.wait_for(workflow_state.wait_for_completion(run_id), timeout=timeout)
+    except asyncio.TimeoutError:
+        success, result, timed_out = False, f"Run timed out after {timeout}s", True
+        workflow_state.cancel_run(run_id)
+    finally:
+        workflow_state.finish_run(run_id)
+
+    await settle_send(send, run_id, success)
+    return run_id, success, result, timed_out
+
+
+async def settle_send(send: asyncio.Task, run_id: str, success: bool) -> None:
+    """Wait for the request that started a run once the run is over, dropping it only if it does not unwind."""
+    if not success:
+        # Cancelled agents unwind quickly; waiting lets their runtime requests complete instead of orphaning them
+        await asyncio.wait({send}, timeout=CANCEL_GRACE_SECONDS)
+
+    if success or send.done():
+        try:
+            await send
+        except Exception as e:
+            logger.debug("Run %s ended with error after completion: %s", run_id, e)
+    else:
+        send.cancel()
+
+
+async def release_key(runtime: AgentRuntime, key: str, drain_timeout: float = CANCEL_GRACE_SECONDS) -> None:
+    """Remove the agent instances of an abandoned key from the runtime and close them once they drain."""
+    _, instances = agent_registry(runtime)
+    released = [instances.pop(agent_id) for agent_id in list(instances) if agent_id.key == key]
+    logger.debug("♻️ Releasing %s agent instances on key %s", len(released), key)
+    await retire_agents(released, drain_timeout)
+
+
+async def run_batch(
+    runtime: AgentRuntime,
+    plan: WorkflowPlan,
+    input_path: str,
+    output_path: str,
+    concurrency: int,
+    timeout: float
+) -> Tuple[int, int, int]:
+    """Stream a JSONL file through the workflow and append results in completion order.
+
+    Inputs whose index is already present in ``output_path`` are skipped, so a crashed
+    batch resumes where it left off. Returns (succeeded, failed, skipped).
+    """
+    completed = load_completed(output_path)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+    releases: Set[asyncio.Task] = set()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def write_record(record: dict) -> None:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["succeeded" if record["success"] else "failed"] += 1
+
+        async def produce() -> None:
+            for item in read_inputs(input_path):
+                if item[0] in completed:
+                    counts["skipped"] += 1
+                    continue
+                await queue.put(item)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def consume(slot: int) -> None:
+            generation = 0
+            while (item := await queue.get()) is not None:
+                index, record_id, text, error = item
+                started = time.monotonic()
+                if error:
+                    run_id, success, result = None, False, error
+                else:
+                    # Each slot owns its own chain of agent instances, so runs never share a delegate
+                    key = f"batch-{slot}-{generation}"
+                    run_id, success, result, timed_out = await run_one(runtime, plan, text, key, timeout)
+                    if timed_out:
+                        # The timed out run may still be unwinding on this key, move to fresh instances and close the old ones
+                        releases.add(asyncio.create_task(release_key(runtime, key)))
+                        generation += 1
+
+                write_record({
+                    "index": index,
+                    "id": record_id,
+                    "run_id": run_id,
+                    "success": success,
+                    "result": result,
+                    "elapsed": round(time.monotonic() - started, 3)
+                })
+                logger.info("%s Batch input %s finished in %.1fs", '✅' if success else '❌', index, time.monotonic() - started)
+
+        await asyncio.gather(produce(), *(consume(slot) for slot in range(concurrency)))
+        await asyncio.gather(*releases)
+
+    return counts["succeeded"], counts["failed"], counts["skipped"]
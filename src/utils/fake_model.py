@@ -0,0 +1,108 @@
+from autogen_core import FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from src.utils.prompts import Prompts
+from typing import Any, AsyncGenerator, Union
+import asyncio
+import json
+import os
+import uuid
+
+FAKE_MODEL_LATENCY = float(os.getenv("FAKE_MODEL_LATENCY", "0"))
+
+
+class FakeChatCompletionClient(ChatCompletionClient):
+    """Deterministic offline model for soak and load testing, selected with MODEL_BACKEND=fake.
+
+    Creator prompts are answered with the template they embed, so code generation
+    works unchanged. When tools are offered for a fresh user message the first tool
+    is called; every other request gets a short text reply.
+    """
+
+    def __init__(self, model_info: ModelInfo, latency: float = FAKE_MODEL_LATENCY) -> None:
+        self._model_info = model_info
+        self._latency = latency
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._last_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    async def create(self, messages, *, tools=(), cancellation_token=None, **kwargs: Any) -> CreateResult:
+        if self._latency:
+            sleep = asyncio.ensure_future(asyncio.sleep(self._latency))
+            if cancellation_token is not None:
+                cancellation_token.link_future(sleep)
+            await sleep
+
+        last = messages[-1] if messages else None
+        text = str(getattr(last, "content", ""))
+        content: Union[str, list]
+        if Prompts.TEMPLATE_HEADER in text:
+            content = text.split(Prompts.TEMPLATE_HEADER, 1)[1]
+        elif tools and not isinstance(last, FunctionExecutionResultMessage):
+            content = [self._call_tool(tools[0], text)]
+        else:
+            content = f"Fake response to: {text[:200]}"
+
+        prompt_tokens = self.count_tokens(messages)
+        completion_tokens = len(str(content)) // 4
+        self._last_usage = RequestUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens + completion_tokens
+        )
+        return CreateResult(
+            finish_reason="function_calls" if isinstance(content, list) else "stop",
+            content=content,
+            usage=self._last_usage,
+            cached=False
+        )
+
+    @staticmethod
+    def _call_tool(tool, text: str) -> FunctionCall:
+        """Call a tool with required string arguments set to the user's message and numbers set to 1."""
+        schema = tool.schema if hasattr(tool, "schema") else tool
+        parameters = schema.get("parameters") or {}
+        properties = parameters.get("properties") or {}
+        arguments = {}
+        for name in parameters.get("required", []):
+            kind = (properties.get(name) or {}).get("type")
+            if kind in (None, "string"):
+                arguments[name] = text
+            elif kind in ("integer", "number"):
+                arguments[name] = 1
+        return FunctionCall(id=uuid.uuid4().hex, arguments=json.dumps(arguments), name=schema["name"])
+
+    async def create_stream(self, messages, **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        yield await self.create(messages, **kwargs)
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._last_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(self, messages, **kwargs: Any) -> int:
+        return sum(len(str(getattr(message, "content", ""))) for message in messages) // 4
+
+    def remaining_tokens(self, messages, **kwargs: Any) -> int:
+        return max(0, 1_000_000 - self.count_tokens(messages))
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return ModelCapabilities(
+            vision=self._model_info["vision"],
+            function_calling=self._model_info["function_calling"],
+            json_output=self._model_info["json_output"]
+        )
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._model_info
@@ -0,0 +1,160 @@
+from autogen_core.models import ChatCompletionClient, CreateResult, ModelCapabilities, ModelInfo, RequestUsage
+from src.utils.metrics import metrics
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, Optional, Union
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("main")
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_INITIAL_DELAY = 5.0
+DEFAULT_HEDGE_MIN_DELAY = 0.5
+DEFAULT_HEDGE_MIN_SAMPLES = 10
+DEFAULT_HEDGE_WINDOW = 200
+HEDGE_OPTIONS = ("percentile", "initial_delay", "min_delay", "min_samples", "window")
+
+
+class LatencyTracker:
+    """Rolling window of model call latencies for a single agent."""
+
+    def __init__(self, window: int = DEFAULT_HEDGE_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+# Shared per agent name so every instance of an agent type learns from the same history
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(name: str, window: int = DEFAULT_HEDGE_WINDOW) -> LatencyTracker:
+    if name not in _trackers:
+        _trackers[name] = LatencyTracker(window)
+    return _trackers[name]
+
+
+class HedgedChatCompletionClient(ChatCompletionClient):
+    """Wraps a model client with request hedging and an optional fallback model.
+
+    When hedging is enabled and a call has not returned by the configured latency
+    percentile, a duplicate request is issued; the first successful result wins and
+    the other call is cancelled. Calls that fail are retried once on the fallback client.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        primary: ChatCompletionClient,
+        fallback: Optional[ChatCompletionClient] = None,
+        hedge: Optional[Union[bool, dict]] = None,
+    ) -> None:
+        self._name = name
+        self._primary = primary
+        self._fallback = fallback
+        self._hedge_enabled = bool(hedge)
+        hedge_config = hedge if isinstance(hedge, dict) else {}
+        self._percentile = float(hedge_config.get("percentile", DEFAULT_HEDGE_PERCENTILE))
+        self._initial_delay = float(hedge_config.get("initial_delay", DEFAULT_HEDGE_INITIAL_DELAY))
+        self._min_delay = float(hedge_config.get("min_delay", DEFAULT_HEDGE_MIN_DELAY))
+        self._min_samples = int(hedge_config.get("min_samples", DEFAULT_HEDGE_MIN_SAMPLES))
+        self._latencies = get_latency_tracker(name, int(hedge_config.get("window", DEFAULT_HEDGE_WINDOW)))
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first call before issuing a duplicate."""
+        if len(self._latencies) < self._min_samples:
+            return self._initial_delay
+        observed = self._latencies.percentile(self._percentile)
+        return max(self._min_delay, observed if observed is not None else self._initial_delay)
+
+    async def create(self, messages, **kwargs: Any) -> CreateResult:
+        try:
+            return await self._create(self._primary, messages, kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            metrics.increment("hedge.fallbacks")
+            logger.warning("🔁 %s: Model call failed (%s), retrying on fallback model", self._name, e)
+            return await self._fallback.create(messages, **kwargs)
+
+    async def _create(self, client: ChatCompletionClient, messages, kwargs: dict) -> CreateResult:
+        started = time.monotonic()
+        if not self._hedge_enabled:
+            result = await client.create(messages, **kwargs)
+            self._latencies.record(time.monotonic() - started)
+            return result
+
+        metrics.increment("hedge.requests")
+        delay = self.hedge_delay()
+        primary = asyncio.create_task(client.create(messages, **kwargs))
+        hedge: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                result = primary.result()
+                self._latencies.record(time.monotonic() - started)
+                return result
+
+            metrics.increment("hedge.issued")
+            logger.debug("🪞 %s: No response after %.2fs, issuing hedged request", self._name, delay)
+            hedge = asyncio.create_task(client.create(messages, **kwargs))
+
+            pending = {primary, hedge}
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is hedge:
+                            metrics.increment("hedge.won")
+                        self._latencies.record(time.monotonic() - started)
+                        return task.result()
+                    last_error = error
+            raise last_error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def create_stream(self, messages, **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        return self._primary.create_stream(messages, **kwargs)
+
+    async def close(self) -> None:
+        await self._primary.close()
+        if self._fallback is not None:
+            await self._fallback.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._primary.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._primary.total_usage()
+
+    def count_tokens(self, messages, **kwargs: Any) -> int:
+        return self._primary.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages, **kwargs: Any) -> int:
+        return self._primary.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._primary.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._primary.model_info
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from types import CodeType, ModuleType
+from typing import Dict, Optional, Tuple
+import hashlib
+import importlib
+import importlib.abc
+import importlib.util
+import logging
+import marshal
+import os
+import sys
+import tempfile
+
+logger = logging.getLogger("main")
+
+BYTECODE_CACHE_DIR = os.path.join(".cache", "bytecode")
+BYTECODE_CACHE_FILES = 256
+CODE_CACHE_SIZE = 64
+
+# Compiled code by source digest, most recently used last
+_code_cache: "OrderedDict[str, CodeType]" = OrderedDict()
+# Module path -> (source digest, module) for generated modules built by this loader
+_modules: Dict[str, Tuple[str, ModuleType]] = {}
+
+
+def source_digest(filename: str, source: str) -> str:
+    """Hash of the source and the filename it is compiled under, which ends up in tracebacks."""
+    return hashlib.sha256(filename.encode("utf-8") + b"\0" + source.encode("utf-8")).hexdigest()
+
+
+def _cache_path(digest: str) -> str:
+    return os.path.join(BYTECODE_CACHE_DIR, f"{digest}.{sys.implementation.cache_tag}.bin")
+
+
+def _read_cached_code(digest: str) -> Optional[CodeType]:
+    path = _cache_path(digest)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    magic = importlib.util.MAGIC_NUMBER
+    if not data.startswith(magic):
+        return None
+    try:
+        code = marshal.loads(data[len(magic):])
+    except (EOFError, ValueError, TypeError) as e:
+        logger.warning("Ignoring unreadable bytecode cache %s: %s", path, e)
+        return None
+    return code if isinstance(code, CodeType) else None
+
+
+def _write_cached_code(digest: str, code: CodeType) -> None:
+    os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+    path = _cache_path(digest)
+    tmp_path = None
+    try:
+        # A unique temporary name, so processes caching the same source never write the same file
+        fd, tmp_path = tempfile.mkstemp(dir=BYTECODE_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+        os.replace(tmp_path, path)
+        tmp_path = None
+        _prune_cache()
+    except OSError as e:
+        logger.warning("Failed to cache bytecode for %s: %s", code.co_filename, e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _prune_cache() -> None:
+    entries = [os.path.join(BYTECODE_CACHE_DIR, name) for name in os.listdir(BYTECODE_CACHE_DIR) if name.endswith(".bin")]
+    if len(entries) <= BYTECODE_CACHE_FILES:
+        return
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:len(entries) - BYTECODE_CACHE_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def compile_source(filename: str, source: str) -> CodeType:
+    """Compile module source, reusing code cached in memory or on disk by content hash. Raises SyntaxError."""
+    digest = source_digest(filename, source)
+    code = _code_cache.get(digest)
+    if code is None:
+        code = _read_cached_code(digest)
+        if code is None:
+            code = compile(source, filename, "exec", dont_inherit=True)
+            _write_cached_code(digest, code)
+        _code_cache[digest] = code
+        while len(_code_cache) > CODE_CACHE_SIZE:
+            _code_cache.popitem(last=False)
+    _code_cache.move_to_end(digest)
+    return code
+
+
+class SourceStringLoader(importlib.abc.InspectLoader):
+    """Executes a module from an in-memory source string instead of a file on sys.path."""
+
+    def __init__(self, filename: str, source: str) -> None:
+        self._filename = filename
+        self._source = source
+
+    def get_source(self, fullname: str) -> str:
+        return self._source
+
+    def get_code(self, fullname: str) -> CodeType:
+        return compile_source(self._filename, self._source)
+
+    def create_module(self, spec) -> Optional[ModuleType]:
+        return None
+
+    def exec_module(self, module: ModuleType) -> None:
+        exec(self.get_code(module.__name__), module.__dict__)
+
+
+def load_module(module_path: str, filename: str, source: str) -> ModuleType:
+    """Return the module built from ``source``, executing it only when the source changed.
+
+    A changed source produces a fresh module object that replaces the old one in
+    ``sys.modules``; instances created from the old module keep running unchanged.
+    """
+    digest = source_digest(filename, source)
+    current = _modules.get(module_path)
+    if current is not None and current[0] == digest and sys.modules.get(module_path) is current[1]:
+        return current[1]
+
+    loader = SourceStringLoader(filename, source)
+    spec = importlib.util.spec_from_loader(module_path, loader, origin=os.path.abspath(filename))
+    spec.has_location = True
+    module = importlib.util.module_from_spec(spec)
+
+    previous = sys.modules.get(module_path)
+    sys.modules[module_path] = module
+    try:
+        loader.exec_module(module)
+    except BaseException:
+        if previous is not None:
+            sys.modules[module_path] = previous
+        else:
+            sys.modules.pop(module_path, None)
+        raise
+
+    parent, _, child = module_path.rpartition(".")
+    if parent:
+        setattr(importlib.import_module(parent), child, module)
+
+    _modules[module_path] = (digest, module)
+    return module
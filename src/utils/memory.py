@@ -0,0 +1,70 @@
+from autogen_core.model_context import BufferedChatCompletionContext, ChatCompletionContext
+from autogen_core.models import FunctionExecutionResultMessage, LLMMessage
+from typing import List, Optional
+
+MEMORY_POLICIES = ("unbounded", "stateless", "last_n", "token_budget")
+DEFAULT_MEMORY_TURNS = 5
+DEFAULT_MEMORY_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(message: LLMMessage) -> int:
+    """Rough token count of a message at about four characters per token.
+
+    Good enough for trimming history and, unlike the model client's count_tokens, needs no
+    tokenizer download and logs nothing for models tiktoken does not know.
+    """
+    return len(str(message.content)) // CHARS_PER_TOKEN + 1
+
+
+class TrimmedBufferContext(BufferedChatCompletionContext):
+    """Buffered context that also drops old messages from storage, not only from the prompt."""
+
+    async def add_message(self, message: LLMMessage) -> None:
+        await super().add_message(message)
+        excess = len(self._messages) - self._buffer_size
+        if excess > 0:
+            del self._messages[:excess]
+
+
+class TokenBudgetContext(ChatCompletionContext):
+    """Keeps the most recent messages that fit in a token budget, dropping the oldest first."""
+
+    def __init__(self, token_limit: int) -> None:
+        super().__init__()
+        self._token_limit = token_limit
+        self._token_counts: List[int] = []
+
+    async def add_message(self, message: LLMMessage) -> None:
+        await super().add_message(message)
+        if len(self._token_counts) != len(self._messages) - 1:
+            # Storage was cleared or restored behind our back, recount everything
+            self._token_counts = [estimate_tokens(m) for m in self._messages[:-1]]
+        self._token_counts.append(estimate_tokens(message))
+
+        # Always keep the newest message, even if it alone exceeds the budget
+        while len(self._messages) > 1 and sum(self._token_counts) > self._token_limit:
+            self._messages.pop(0)
+            self._token_counts.pop(0)
+
+    async def get_messages(self) -> List[LLMMessage]:
+        messages = list(self._messages)
+        if messages and isinstance(messages[0], FunctionExecutionResultMessage):
+            messages = messages[1:]
+        return messages
+
+    async def clear(self) -> None:
+        await super().clear()
+        self._token_counts = []
+
+
+def create_model_context(memory: dict, has_tools: bool) -> Optional[ChatCompletionContext]:
+    """Build the delegate's model context for a spec's memory policy. None means the delegate default."""
+    policy = memory.get("policy", "unbounded")
+    if policy == "last_n":
+        # A turn is the input and reply, plus the tool call and its results for agents with tools
+        messages_per_turn = 4 if has_tools else 2
+        return TrimmedBufferContext(buffer_size=messages_per_turn * int(memory.get("turns", DEFAULT_MEMORY_TURNS)))
+    if policy == "token_budget":
+        return TokenBudgetContext(token_limit=int(memory.get("max_tokens", DEFAULT_MEMORY_TOKENS)))
+    return None
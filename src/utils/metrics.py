@@ -0,0 +1,38 @@
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def rate(self, numerator: str, denominator: str) -> float:
+        """Ratio of two counters, 0.0 when the denominator has not been hit."""
+        total = self.get(denominator)
+        return self.get(numerator) / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+    def summary(self) -> str:
+        parts = [f"{name}={value}" for name, value in sorted(self._counters.items())]
+        if self.get("hedge.requests"):
+            parts.append(f"hedge.rate={self.rate('hedge.issued', 'hedge.requests'):.1%}")
+        if self.get("coalesce.joined"):
+            parts.append(f"coalesce.rate={self.get('coalesce.joined') / (self.get('coalesce.joined') + self.get('coalesce.leaders')):.1%}")
+        lookups = self.get("tool_cache.hit") + self.get("tool_cache.miss") + self.get("tool_cache.coalesced")
+        if lookups:
+            parts.append(f"tool_cache.hit_rate={(lookups - self.get('tool_cache.miss')) / lookups:.1%}")
+        return ", ".join(parts)
+
+    def reset(self) -> None:
+        self._counters.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import hashlib
+import logging
+import os
+import pickle
+import re
+import tempfile
+
+logger = logging.getLogger("main")
+
+# Bump whenever the plan dataclasses change so stale cache entries are ignored
+PLAN_VERSION = "5"
+PLAN_CACHE_DIR = os.path.join(".cache", "plans")
+
+
+class PlanError(Exception):
+    """Raised when a workflow configuration cannot be compiled into a plan."""
+
+
+@dataclass(frozen=True)
+class RoutePlan:
+    """One rule of a router node. Every condition that is set must hold for the rule to match."""
+    output_to: str
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+    pattern: Optional[re.Pattern] = None
+    field: Optional[str] = None
+    equals: Any = None
+    # Set when the rule has an equals key, so ``equals: null`` compares against null
+    check_equals: bool = False
+
+    def describe(self) -> str:
+        conditions = []
+        if self.min_length is not None:
+            conditions.append(f"len≥{self.min_length}")
+        if self.max_length is not None:
+            conditions.append(f"len≤{self.max_length}")
+        if self.pattern is not None:
+            conditions.append(f"/{self.pattern.pattern}/")
+        if self.field is not None:
+            conditions.append(f"{self.field}={self.equals!r}" if self.check_equals else f"has {self.field}")
+        return f"{' & '.join(conditions)}→{self.output_to}"
+
+
+@dataclass
+class AgentPlan:
+    agent_name: str
+    filename: str
+    module_path: str
+    template_file: str
+    description: str
+    system_message: str
+    timeout: int
+    output_to: Optional[str]
+    # Tool servers are read from spec["tools"] when an agent starts, ${VAR} values are resolved there
+    spec: Dict[str, Any]
+    kind: str = "agent"
+    routes: List[RoutePlan] = field(default_factory=list)
+
+
+@dataclass
+class WorkflowPlan:
+    plan_id: str
+    agents: List[AgentPlan]
+    head_agent: str
+    test_message: Optional[str]
+    route: List[str]
+    input_mode: str = "test_message"
+    input_prompt: str = "What would you like me to help you with?"
+    input_timeout: float = 30.0
+    coalesce: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    def get_agent(self, agent_name: str) -> Optional[AgentPlan]:
+        return next((agent for agent in self.agents if agent.agent_name == agent_name), None)
+
+
+# Compiled plans handed between agents in-process; messages only carry the plan_id
+_plans: Dict[str, WorkflowPlan] = {}
+
+
+def register_plan(plan: WorkflowPlan) -> str:
+    _plans[plan.plan_id] = plan
+    return plan.plan_id
+
+
+def get_plan(plan_id: Optional[str]) -> Optional[WorkflowPlan]:
+    return _plans.get(plan_id) if plan_id else None
+
+
+def hash_config(raw: bytes) -> str:
+    return hashlib.sha256(PLAN_VERSION.encode() + b"\0" + raw).hexdigest()
+
+
+def read_cached_plan(plan_id: str) -> Optional[WorkflowPlan]:
+    path = os.path.join(PLAN_CACHE_DIR, f"{plan_id}.pickle")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            plan = pickle.load(f)
+    except Exception as e:
+        logger.warning("Ignoring unreadable cached plan %s: %s", path, e)
+        return None
+    return plan if isinstance(plan, WorkflowPlan) and plan.plan_id == plan_id else None
+
+
+def write_cached_plan(plan: WorkflowPlan) -> None:
+    os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+    path = os.path.join(PLAN_CACHE_DIR, f"{plan.plan_id}.pickle")
+    tmp_path = None
+    try:
+        # A unique temporary name, so processes compiling the same config never write the same file
+        fd, tmp_path = tempfile.mkstemp(dir=PLAN_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(plan, f)
+        os.replace(tmp_path, path)
+        tmp_path = None
+    except OSError as e:
+        logger.warning("Failed to cache workflow plan %s: %s", plan.plan_id, e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
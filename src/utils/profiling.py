@@ -0,0 +1,153 @@
+from src.utils.metrics import metrics
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("main")
+
+# Defaults for PROFILE_DIR, LOOP_STALL_THRESHOLD and PROFILE_SAMPLE_INTERVAL. The environment is read
+# when a monitor or profiler is created, main() loads .env after the modules are imported.
+PROFILE_DIR = "profiles"
+LOOP_LAG_INTERVAL = 0.05
+LOOP_STALL_THRESHOLD = 0.25
+SAMPLE_INTERVAL = 0.005
+STALL_STACK_DEPTH = 15
+
+
+class LoopMonitor:
+    """Measures event loop lag and logs the loop thread's stack whenever the loop stalls.
+
+    A heartbeat task records how late each sleep wakes up. A watchdog thread notices
+    when the heartbeat stops and captures what the loop thread is running at that moment.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, stall_threshold: Optional[float] = None) -> None:
+        self._interval = interval
+        if stall_threshold is None:
+            stall_threshold = float(os.getenv("LOOP_STALL_THRESHOLD", str(LOOP_STALL_THRESHOLD)))
+        self._stall_threshold = stall_threshold
+        self._lags: Deque[float] = deque(maxlen=10000)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            self._lags.append(max(0.0, now - expected))
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self._interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self._interval
+            if blocked < self._stall_threshold or heartbeat == reported:
+                continue
+
+            # Report each stall once, with the stack of whatever is holding the loop
+            reported = heartbeat
+            metrics.increment("loop.stalls")
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)[-STALL_STACK_DEPTH:]) if frame is not None else "<unavailable>\n"
+            logger.warning(
+                "🐢 Event loop blocked for %.0fms, loop thread is at:\n%s",
+                blocked * 1000,
+                stack.rstrip(),
+                extra={"truncate": False}
+            )
+
+    def summary(self) -> str:
+        if not self._lags:
+            return "no samples"
+        ordered = sorted(self._lags)
+        p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+        return (
+            f"samples={len(ordered)}, mean={sum(ordered) / len(ordered) * 1000:.1f}ms, "
+            f"p99={p99 * 1000:.1f}ms, max={ordered[-1] * 1000:.1f}ms, stalls={metrics.get('loop.stalls')}"
+        )
+
+
+class SamplingProfiler:
+    """Periodically samples one thread's stack and counts collapsed stacks for flamegraphs."""
+
+    def __init__(self, thread_id: int, interval: Optional[float] = None) -> None:
+        self._thread_id = thread_id
+        if interval is None:
+            interval = float(os.getenv("PROFILE_SAMPLE_INTERVAL", str(SAMPLE_INTERVAL)))
+        self._interval = interval
+        self._stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self._stacks[";".join(reversed(frames))] += 1
+
+    def write(self, path: str) -> int:
+        """Write stacks in the collapsed format read by flamegraph.pl and speedscope. Returns the sample count."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(self._stacks.values())
+
+
+@contextmanager
+def sample_stacks(name: str, directory: Optional[str] = None) -> Iterator[None]:
+    """Sample the calling thread (the event loop) while the block runs and write ``<directory>/<name>-<time>.folded``."""
+    directory = directory or os.getenv("PROFILE_DIR", PROFILE_DIR)
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        samples = profiler.write(path)
+        logger.info("🔥 Wrote %s stack samples to %s", samples, path)
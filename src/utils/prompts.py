@@ -1,4 +1,6 @@
 class Prompts:
+    # Separates the generation instructions from the template source in Creator prompts
+    TEMPLATE_HEADER = "Here is the template:\n\n"
 
     @staticmethod
     def get_creator_system_message():
@@ -34,8 +36,7 @@ class Prompts:
             f"Here is the REQUIRED system message to use:\n{system_message}\n\n"
             f"Use this EXACT system message in the agent - do not modify or generate a different one.\n\n"
             f"Respond only with valid Python code, no explanations or markdown fences.\n\n"
-            "Here is the template:\n\n"
-        )
+        ) + Prompts.TEMPLATE_HEADER
         return CREATOR_PROMPT
     
     @staticmethod
@@ -0,0 +1,54 @@
+from autogen_core import Agent, AgentId, AgentRuntime
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+logger = logging.getLogger("main")
+
+# autogen has no public API to swap a factory or drop live instances, so hot reload and batch
+# slot recycling use the runtime's private maps. Checked against these autogen-core releases:
+# SingleThreadedAgentRuntime and GrpcWorkerAgentRuntime both keep _agent_factories and _instantiated_agents.
+AUTOGEN_CHECKED_VERSIONS = ("0.7.4",)
+
+_version_checked = False
+
+
+def autogen_version() -> str:
+    try:
+        return version("autogen-core")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def agent_registry(runtime: AgentRuntime) -> Tuple[Dict[str, Callable[[], Any]], Dict[AgentId, Agent]]:
+    """Return the runtime's (factories by agent type, live instances by id). Raises RuntimeError if they moved."""
+    global _version_checked
+    installed = autogen_version()
+    if not _version_checked and installed not in AUTOGEN_CHECKED_VERSIONS:
+        _version_checked = True
+        logger.warning(
+            "⚠️ autogen-core %s has not been checked for agent hot swapping (checked: %s)",
+            installed,
+            ", ".join(AUTOGEN_CHECKED_VERSIONS)
+        )
+
+    factories = getattr(runtime, "_agent_factories", None)
+    instances = getattr(runtime, "_instantiated_agents", None)
+    if factories is None or instances is None:
+        logger.error(
+            "💥 %s on autogen-core %s no longer exposes _agent_factories/_instantiated_agents, "
+            "agents cannot be replaced or released until src/utils/runtime.py is updated",
+            type(runtime).__name__,
+            installed
+        )
+        raise RuntimeError(f"{type(runtime).__name__} does not support in-place re-registration")
+    return factories, instances
+
+
+async def retire_agents(agents: List[Agent], drain_timeout: float) -> None:
+    """Close agent instances already removed from the runtime, once their in-flight messages drain."""
+    for instance in agents:
+        if hasattr(instance, "drain") and not await instance.drain(drain_timeout):
+            logger.warning("%s: In-flight messages did not drain within %ss, leaving old instance open", instance.id, drain_timeout)
+            continue
+        await instance.close()
@@ -0,0 +1,185 @@
+from autogen_core import AgentId, AgentRuntime
+from src.agents.router import ROUTER_KIND
+from src.utils import utils
+from src.utils.batch import release_key, run_one
+from src.utils.metrics import metrics
+from src.utils.plan import WorkflowPlan
+from dataclasses import dataclass
+from typing import List, Optional
+import asyncio
+import gc
+import logging
+import os
+import tracemalloc
+
+logger = logging.getLogger("main")
+
+SOAK_INPUT = "What's the latest AI news?"
+RELOAD_MARKER = "# soak reload "
+# Reloading appends a marker to each agent file, only these untracked soak files may be rewritten
+RELOADABLE_PREFIX = os.path.join("generated", "soak_")
+
+
+@dataclass
+class SoakLimits:
+    """Largest growth from the post-warmup baseline that still passes a soak."""
+    memory_mb: float = 20.0
+    fds: int = 10
+    processes: int = 2
+    tasks: int = 10
+
+
+@dataclass
+class ResourceSample:
+    iteration: int
+    memory: int
+    fds: int
+    processes: int
+    tasks: int
+
+    def describe(self) -> str:
+        return f"memory={self.memory / 1e6:.1f}MB fds={self.fds} processes={self.processes} tasks={self.tasks}"
+
+
+def count_open_fds() -> int:
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return -1
+
+
+def count_child_processes() -> int:
+    """Live direct children of this process, e.g. MCP stdio servers. -1 where /proc is unavailable."""
+    if not os.path.isdir("/proc"):
+        return -1
+    pid = os.getpid()
+    children = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, ...
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1 and fields[0] != "Z" and int(fields[1]) == pid:
+            children += 1
+    return children
+
+
+def take_sample(iteration: int) -> ResourceSample:
+    gc.collect()
+    return ResourceSample(
+        iteration=iteration,
+        memory=tracemalloc.get_traced_memory()[0],
+        fds=count_open_fds(),
+        processes=count_child_processes(),
+        tasks=len(asyncio.all_tasks())
+    )
+
+
+def check_growth(baseline: ResourceSample, final: ResourceSample, limits: SoakLimits) -> List[str]:
+    """Return a message for every resource that grew past its limit."""
+    failures = []
+    memory_growth = (final.memory - baseline.memory) / 1e6
+    if memory_growth > limits.memory_mb:
+        failures.append(f"memory grew {memory_growth:.1f}MB (limit {limits.memory_mb}MB)")
+    for name in ("fds", "processes", "tasks"):
+        growth = getattr(final, name) - getattr(baseline, name)
+        if growth > getattr(limits, name):
+            failures.append(f"{name} grew by {growth} (limit {getattr(limits, name)})")
+    return failures
+
+
+def unreloadable_files(plan: WorkflowPlan) -> List[str]:
+    """Agent files a soak reload would rewrite that are not generated soak files."""
+    return [
+        agent.filename for agent in plan.agents
+        if agent.kind != ROUTER_KIND and not os.path.normpath(agent.filename).startswith(RELOADABLE_PREFIX)
+    ]
+
+
+async def reload_agents(runtime: AgentRuntime, plan: WorkflowPlan, iteration: int) -> None:
+    """Touch every generated agent file and have Creator hot reload them, as watch mode would."""
+    for agent in plan.agents:
+        if agent.kind == ROUTER_KIND:
+            continue
+        with open(agent.filename, "r", encoding="utf-8") as f:
+            source = f.read().split(RELOAD_MARKER)[0].rstrip("\n")
+        with open(agent.filename, "w", encoding="utf-8") as f:
+            f.write(f"{source}\n{RELOAD_MARKER}{iteration}\n")
+    response = await runtime.send_message(utils.Message(content="", sender="Host", plan_id=plan.plan_id), AgentId("Creator", "default"))
+    if response.content:
+        logger.warning("Soak reload at iteration %s reported: %s", iteration, response.content)
+
+
+async def run_soak(
+    runtime: AgentRuntime,
+    plan: WorkflowPlan,
+    iterations: int,
+    sample_every: int,
+    warmup: int,
+    timeout: float,
+    limits: SoakLimits,
+    reload_every: int = 0
+) -> bool:
+    """Run the workflow repeatedly on one set of agent instances and fail if resources keep growing.
+
+    A baseline is sampled after ``warmup`` runs, so one-off caches and imports do not count
+    as growth. Returns True when every run succeeded and growth stayed within ``limits``.
+    """
+    if reload_every:
+        refused = unreloadable_files(plan)
+        if refused:
+            logger.error("💥 Soak refused: --reload-every would rewrite %s, name agent files %s*.py", ", ".join(refused), RELOADABLE_PREFIX)
+            return False
+
+    tracemalloc.start()
+    baseline: Optional[ResourceSample] = None
+    baseline_snapshot = None
+    failed = 0
+    generation = 0
+    # Agents start without the tools of a server that fails to load, so the runs alone would still pass
+    tool_failures = metrics.get("tools.load_failures")
+
+    try:
+        for iteration in range(1, iterations + 1):
+            if reload_every and iteration % reload_every == 0:
+                await reload_agents(runtime, plan, iteration)
+
+            key = f"soak-{generation}"
+            run_id, success, result, timed_out = await run_one(runtime, plan, SOAK_INPUT, key, timeout)
+            if not success:
+                failed += 1
+                logger.error("❌ Soak run %s failed: %s", iteration, result)
+            if timed_out:
+                await release_key(runtime, key)
+                generation += 1
+
+            if iteration == warmup or (baseline is None and iteration == iterations):
+                baseline = take_sample(iteration)
+                baseline_snapshot = tracemalloc.take_snapshot()
+                logger.info("🧪 Soak baseline after %s runs: %s", iteration, baseline.describe())
+            elif sample_every and iteration % sample_every == 0:
+                logger.info("🧪 Soak %s/%s: %s", iteration, iterations, take_sample(iteration).describe())
+
+        final = take_sample(iterations)
+        final_snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    logger.info("🧪 Soak finished after %s runs (%s failed): %s", iterations, failed, final.describe())
+    for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+        logger.info("📈 %s", stat)
+
+    failures = check_growth(baseline, final, limits)
+    if failed:
+        failures.append(f"{failed} of {iterations} runs failed")
+    tool_failures = metrics.get("tools.load_failures") - tool_failures
+    if tool_failures:
+        failures.append(f"{tool_failures} tool server loads failed")
+    for failure in failures:
+        logger.error("💥 Soak failed: %s", failure)
+    return not failures
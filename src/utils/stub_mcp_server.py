@@ -0,0 +1,14 @@
+from mcp.server.fastmcp import FastMCP
+
+# Minimal MCP stdio server for soak and load tests: python -m src.utils.stub_mcp_server
+server = FastMCP("stub", log_level="WARNING")
+
+
+@server.tool()
+def search(query: str) -> str:
+    """Search the web and return the top results for a query."""
+    return f"Top results for {query!r}: stub result one; stub result two; stub result three."
+
+
+if __name__ == "__main__":
+    server.run("stdio")
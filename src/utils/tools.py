@@ -0,0 +1,219 @@
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool
+from src.utils.metrics import metrics
+from collections import OrderedDict
+from dataclasses import dataclass
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, Union
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger("main")
+
+DEFAULT_TOOL_CACHE_TTL = 300.0
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ToolCache:
+    """LRU cache of tool results with per-entry TTL and coalescing of concurrent identical calls."""
+
+    def __init__(self, max_size: int = TOOL_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, _Flight] = {}
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self._max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def call(
+        self,
+        key: str,
+        ttl: float,
+        fn: Callable[[CancellationToken], Awaitable[Any]],
+        cancellation_token: CancellationToken
+    ) -> Any:
+        """Return a cached result for the key, join an identical call in flight, or run fn and cache its result."""
+        hit, value = self.get(key)
+        if hit:
+            metrics.increment("tool_cache.hit")
+            return value
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            metrics.increment("tool_cache.miss")
+            flight = _Flight(asyncio.create_task(self._fill(key, ttl, fn)))
+            self._in_flight[key] = flight
+        else:
+            metrics.increment("tool_cache.coalesced")
+            logger.debug("🔗 Joining in-flight tool call %s", key)
+
+        # Shield the shared call so one caller cancelling does not fail the others
+        flight.waiters += 1
+        waiter = asyncio.shield(flight.task)
+        cancellation_token.link_future(waiter)
+        try:
+            return await waiter
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    async def _fill(self, key: str, ttl: float, fn: Callable[[CancellationToken], Awaitable[Any]]) -> Any:
+        try:
+            value = await fn(CancellationToken())
+            self.put(key, value, ttl)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+tool_cache = ToolCache()
+
+
+class _WrappedTool(BaseTool[BaseModel, Any]):
+    """Base for tools that decorate another tool's run_json while keeping its schema and formatting."""
+
+    def __init__(self, tool: BaseTool) -> None:
+        super().__init__(tool.args_type(), tool.return_type(), tool.name, tool.description)
+        self._tool = tool
+
+    @property
+    def schema(self):
+        return self._tool.schema
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self._tool.run(args, cancellation_token)
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self._tool.return_value_as_string(value)
+
+
+class CachedTool(_WrappedTool):
+    """Wraps a tool so identical calls are served from the shared tool cache. Errors are never cached."""
+
+    def __init__(self, tool: BaseTool, namespace: str, ttl: float, cache: Optional[ToolCache] = None) -> None:
+        super().__init__(tool)
+        self._namespace = namespace
+        self._ttl = ttl
+        self._cache = cache or tool_cache
+
+    def cache_key(self, args: Mapping[str, Any]) -> str:
+        canonical = json.dumps(dict(args), sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return f"{self._namespace}/{self.name}:{canonical}"
+
+    async def run_json(self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: Optional[str] = None) -> Any:
+        return await self._cache.call(
+            self.cache_key(args),
+            self._ttl,
+            lambda token: self._tool.run_json(args, token, call_id=call_id),
+            cancellation_token
+        )
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a single tool call exceeds its timeout."""
+
+
+class LimitedTool(_WrappedTool):
+    """Wraps a tool with a per-call timeout and an optional semaphore shared by an agent's tools.
+
+    A timed out call fails on its own; the delegate reports it as an error result next to
+    the results of the other tool calls from the same turn.
+    """
+
+    def __init__(self, tool: BaseTool, timeout: Optional[float] = None, semaphore: Optional[asyncio.Semaphore] = None) -> None:
+        super().__init__(tool)
+        self._timeout = timeout
+        self._semaphore = semaphore
+
+    async def run_json(self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: Optional[str] = None) -> Any:
+        if self._semaphore is None:
+            return await self._run_with_timeout(args, cancellation_token, call_id)
+        async with self._semaphore:
+            return await self._run_with_timeout(args, cancellation_token, call_id)
+
+    async def _run_with_timeout(self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: Optional[str]) -> Any:
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(self._tool.run_json(args, cancellation_token, call_id=call_id), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            metrics.increment("tool.timeouts")
+            logger.warning("⏰ Tool %s timed out after %.1fs", self.name, time.monotonic() - started)
+            raise ToolTimeoutError(f"Tool {self.name} timed out after {self._timeout}s, no result is available") from None
+
+
+def cache_tools(tools: List[BaseTool], namespace: str, cache_config: Optional[Union[bool, dict]]) -> List[BaseTool]:
+    """Wrap the tools of one MCP server according to its ``cache`` spec.
+
+    ``cache: true`` caches every tool for the default TTL. A dict may set ``ttl`` and
+    ``cacheable`` for the server and override either per tool under ``tools``.
+    """
+    if not cache_config:
+        return tools
+
+    config = cache_config if isinstance(cache_config, dict) else {}
+    overrides = config.get("tools") or {}
+    wrapped = []
+    for tool in tools:
+        tool_config = {**config, **(overrides.get(tool.name) or {})}
+        if not tool_config.get("cacheable", True):
+            wrapped.append(tool)
+            continue
+        wrapped.append(CachedTool(tool, namespace, float(tool_config.get("ttl", DEFAULT_TOOL_CACHE_TTL))))
+    return wrapped
+
+
+def limit_tools(
+    tools: List[BaseTool],
+    timeout: Optional[float],
+    semaphore: Optional[asyncio.Semaphore],
+    overrides: Optional[Dict[str, float]] = None
+) -> List[BaseTool]:
+    """Apply per-call timeouts and a shared concurrency limit to tools. ``overrides`` maps tool names to timeouts."""
+    overrides = overrides or {}
+    if not timeout and not overrides and semaphore is None:
+        return tools
+    limited = []
+    for tool in tools:
+        tool_timeout = overrides.get(tool.name, timeout)
+        limited.append(LimitedTool(tool, float(tool_timeout) if tool_timeout else None, semaphore))
+    return limited
+
+
+def server_command(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run ``command: "python"`` servers on this interpreter instead of whichever ``python`` PATH finds first."""
+    if params.get("command") == "python":
+        return {**params, "command": sys.executable}
+    return params
@@ -1,12 +1,27 @@
 from dataclasses import dataclass
+from autogen_core.models import ChatCompletionClient
 from autogen_ext.models.openai._model_info import ModelInfo
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+import atexit
+import json
 import logging
-from typing import Any
+import logging.handlers
+import os
+import queue
+from typing import Any, Optional
+
+# Longest string argument kept in a log line, overridable with LOG_PAYLOAD_LIMIT
+DEFAULT_LOG_PAYLOAD_LIMIT = 500
 
 @dataclass
 class Message:
     content: str
     sender: str
+    # Plain str defaults: the runtime's dataclass serializer rejects Optional fields
+    plan_id: str = ""
+    run_id: str = ""
+    # Wall-clock time.time() the run must finish by, 0.0 for none; absolute so it survives process hops
+    deadline: float = 0.0
 
 class ColorFormatter(logging.Formatter):
     COLORS = {
@@ -26,10 +41,78 @@ class ColorFormatter(logging.Formatter):
         
         return f"{color}{prefix}{self.RESET} {msg}"
     
-def setup_logging(level: int = logging.INFO) -> None:
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            # QueueHandler has already folded any traceback into the message
+            "message": record.getMessage(),
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TruncatingFilter(logging.Filter):
+    """Truncates long string arguments so message payloads cannot flood the log.
+
+    Records logged with ``extra={"truncate": False}`` are passed through untouched.
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self._limit = limit
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple) and getattr(record, "truncate", True):
+            record.args = tuple(truncate(arg, self._limit) if isinstance(arg, str) else arg for arg in record.args)
+        return True
+
+
+def truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_log_listener() -> None:
+    """Flush and stop the current listener. Safe to call repeatedly, stopping a listener twice raises on older Pythons."""
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(_stop_log_listener)
+
+
+def setup_logging(level: int = logging.INFO, json_output: bool = False, payload_limit: Optional[int] = None) -> None:
+    """Route all logging through a queue so formatting and stream I/O happen on a listener thread."""
+    global _log_listener
+    _stop_log_listener()
+
+    # Read here rather than at import, main() loads .env after the modules are imported
+    if payload_limit is None:
+        payload_limit = int(os.getenv("LOG_PAYLOAD_LIMIT", str(DEFAULT_LOG_PAYLOAD_LIMIT)))
+
     handler = logging.StreamHandler()
-    handler.setFormatter(ColorFormatter("%(asctime)s - %(name)s - %(message)s"))
-    logging.basicConfig(level=level, handlers=[handler])
+    if json_output:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(ColorFormatter("%(asctime)s - %(name)s - %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Only merge the message arguments on the calling thread, the listener applies the real formatter
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler.addFilter(TruncatingFilter(payload_limit))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _log_listener.start()
     
     autogen_loggers = [
         "autogen_core",
@@ -55,4 +138,15 @@ GEMINI_INFO = ModelInfo(
     structured_output=True
 )
 
-MODEL_NAME = "gemini-2.5-flash"
\ No newline at end of file
+MODEL_NAME = "gemini-2.5-flash"
+
+
+def create_model_client(model: str = MODEL_NAME) -> ChatCompletionClient:
+    if os.getenv("MODEL_BACKEND", "openai").lower() == "fake":
+        from src.utils.fake_model import FakeChatCompletionClient
+        return FakeChatCompletionClient(GEMINI_INFO)
+    return OpenAIChatCompletionClient(
+        model=model,
+        model_info=GEMINI_INFO,
+        api_key=os.getenv("GOOGLE_API_KEY")
+    )
\ No newline at end of file
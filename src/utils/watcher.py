@@ -0,0 +1,42 @@
+from typing import AsyncIterator, Dict, Iterable, Set, Tuple
+import asyncio
+import glob
+import os
+
+
+def snapshot_files(patterns: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """Map every file matching the glob patterns to its (mtime_ns, size)."""
+    files = {}
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+async def watch_files(patterns: Iterable[str], interval: float = 1.0) -> AsyncIterator[Set[str]]:
+    """Poll the glob patterns and yield the set of paths that changed, once writes have settled."""
+    patterns = list(patterns)
+    previous = snapshot_files(patterns)
+
+    while True:
+        await asyncio.sleep(interval)
+        current = snapshot_files(patterns)
+        changed = {path for path in current.keys() | previous.keys() if current.get(path) != previous.get(path)}
+        if not changed:
+            continue
+
+        # Wait for editors and Creator to finish writing before reporting the change
+        while True:
+            await asyncio.sleep(interval)
+            settled = snapshot_files(patterns)
+            if settled == current:
+                break
+            changed |= {path for path in settled.keys() | current.keys() if settled.get(path) != current.get(path)}
+            current = settled
+
+        previous = current
+        yield changed
@@ -0,0 +1,87 @@
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+from src.agents.creator import Creator
+from src.agents.end import End
+from src.agents.start import Start
+from src.templates import agent as agent_template
+from src.utils.batch import load_completed, read_inputs, run_one
+from src.utils.plan import register_plan
+import asyncio
+import json
+
+
+def test_load_completed_missing_file(tmp_path):
+    assert load_completed(str(tmp_path / "out.jsonl")) == set()
+
+
+def test_load_completed_truncates_partial_last_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    complete = "".join(json.dumps({"index": i, "success": True}) + "\n" for i in (0, 2))
+    path.write_text(complete + '{"index": 5, "succ', encoding="utf-8")
+
+    assert load_completed(str(path)) == {0, 2}
+    assert path.read_text(encoding="utf-8") == complete
+
+
+def test_load_completed_stops_at_corrupt_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"index": 0}\nnot json\n{"index": 1}\n', encoding="utf-8")
+
+    assert load_completed(str(path)) == {0}
+    assert path.read_text(encoding="utf-8") == '{"index": 0}\n'
+
+
+def test_read_inputs_accepts_strings_and_objects(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text(
+        '"plain"\n'
+        '\n'
+        '{"id": 7, "input": "with id"}\n'
+        '{"message": "message field"}\n'
+        '{"content": "content field"}\n',
+        encoding="utf-8"
+    )
+
+    assert list(read_inputs(str(path))) == [
+        (0, None, "plain", None),
+        (2, "7", "with id", None),
+        (3, None, "message field", None),
+        (4, None, "content field", None),
+    ]
+
+
+def test_read_inputs_reports_bad_lines(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{bad\n{"id": "x"}\n42\n', encoding="utf-8")
+
+    items = list(read_inputs(str(path)))
+    assert [item[0] for item in items] == [0, 1, 2]
+    assert items[0][3].startswith("Invalid JSON")
+    assert items[1] == (1, "x", None, "Missing input field")
+    assert items[2] == (2, None, None, "Input must be a JSON string or object")
+
+
+def test_inputs_on_one_slot_do_not_share_history(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "fake")
+    config = {"agents": [{"agent_name": "echo", "description": "d", "system_message": "s", "test_message": "t"}]}
+    plan = Creator.compile_plan(config, "test-batch-isolation")
+    register_plan(plan)
+
+    async def scenario():
+        runtime = SingleThreadedAgentRuntime()
+        await Start.register(runtime, "Start", lambda: Start("Start"))
+        await End.register(runtime, "End", lambda: End("End"))
+        await agent_template.Agent.register(runtime, "echo", lambda: agent_template.Agent("echo", "s", {"agent_name": "echo"}))
+        runtime.start()
+        try:
+            first = await run_one(runtime, plan, "first input", "batch-0-0", 10)
+            second = await run_one(runtime, plan, "second input", "batch-0-0", 10)
+            agent = await runtime.try_get_underlying_agent_instance(AgentId("echo", "batch-0-0"))
+            history = [str(message.content) for message in await agent._delegate._model_context.get_messages()]
+        finally:
+            await runtime.stop()
+        return first, second, history
+
+    first, second, history = asyncio.run(scenario())
+    assert first[1] and second[1]
+    assert "first input" not in second[2]
+    assert history and not any("first input" in content for content in history)
@@ -0,0 +1,37 @@
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+from src.agents.creator import Creator
+from src.agents.router import Router
+from src.utils.plan import PlanError
+import asyncio
+import pytest
+
+
+@pytest.mark.parametrize("raw", [
+    "agents: [fetcher]",
+    "agents:\n  - agent_name: a\n    description: d\n    system_message: s\n    tools: [brave]",
+    "agents:\n  - agent_name: a\n    tools: brave",
+    "workflow_config: fast\nagents: []",
+])
+def test_malformed_config_raises_plan_error(raw):
+    with pytest.raises(PlanError, match="Malformed configuration"):
+        Creator.compile_config(raw)
+
+
+def test_readded_agent_replaces_existing_registration(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "fake")
+    config = {"agents": [{"agent_name": "pick", "type": "router", "output_to": "End", "routes": [{"output_to": "End", "min_length": 1}]}]}
+    router = Creator.compile_plan(config, "test-readd").get_agent("pick")
+
+    async def scenario():
+        runtime = SingleThreadedAgentRuntime()
+        await Creator.register(runtime, "Creator", lambda: Creator("Creator"))
+        creator = await runtime.try_get_underlying_agent_instance(AgentId("Creator", "default"))
+        await creator._register(Router, "pick", lambda: Router(router), 1)
+        first = await runtime.try_get_underlying_agent_instance(AgentId("pick", "default"))
+        # Dropped from the workflow and added back: the type is still registered on the runtime
+        await creator._register(Router, "pick", lambda: Router(router), 1)
+        second = await runtime.try_get_underlying_agent_instance(AgentId("pick", "default"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is not second
@@ -0,0 +1,60 @@
+from autogen_core import AgentId, MessageContext, RoutedAgent, SingleThreadedAgentRuntime, message_handler
+from src.templates import agent as agent_template
+from src.templates.base_agent import BaseAgent
+from src.utils import utils
+from types import SimpleNamespace
+import asyncio
+import time
+
+
+class Recorder(RoutedAgent):
+    """Stands in for an agent and keeps every message it receives."""
+
+    received = []
+
+    def __init__(self) -> None:
+        super().__init__("recorder")
+
+    @message_handler
+    async def handle_message(self, message: utils.Message, ctx: MessageContext) -> utils.Message:
+        Recorder.received.append((self.id.type, message))
+        return utils.Message(content="", sender=self.id.type)
+
+
+def effective_timeout(agent_timeout, deadline):
+    return BaseAgent._effective_timeout(SimpleNamespace(_timeout=agent_timeout), utils.Message(content="", sender="t", deadline=deadline))
+
+
+def test_effective_timeout_without_deadline_is_the_agent_timeout():
+    assert effective_timeout(30, 0.0) == 30
+
+
+def test_effective_timeout_is_capped_by_the_run_deadline():
+    assert 9 < effective_timeout(30, time.time() + 10) <= 10
+    assert effective_timeout(5, time.time() + 10) == 5
+    assert effective_timeout(30, time.time() - 1) < 0
+
+
+def test_agent_skips_straight_to_end_after_the_deadline(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "fake")
+    Recorder.received = []
+    spec = {"agent_name": "echo", "output_to": "next"}
+
+    async def scenario():
+        runtime = SingleThreadedAgentRuntime()
+        await agent_template.Agent.register(runtime, "echo", lambda: agent_template.Agent("echo", "s", spec))
+        await Recorder.register(runtime, "next", Recorder)
+        await Recorder.register(runtime, "End", Recorder)
+        runtime.start()
+        try:
+            late = utils.Message(content="input", sender="Start", run_id="late-run", deadline=time.time() - 1)
+            await runtime.send_message(late, AgentId("echo", "k"))
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    assert len(Recorder.received) == 1
+    target, message = Recorder.received[0]
+    assert target == "End"
+    assert message.content == "Agent echo skipped: run deadline exceeded"
+    assert message.run_id == "late-run" and message.sender == "echo"
@@ -0,0 +1,115 @@
+from src.agents.creator import Creator
+from src.utils.hedging import HedgedChatCompletionClient, LatencyTracker
+import asyncio
+import itertools
+import pytest
+
+_names = itertools.count()
+
+
+class ScriptedClient:
+    """Answers each create() call after its scripted delay, or raises its scripted error."""
+
+    def __init__(self, *script):
+        self._script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def create(self, messages, **kwargs):
+        delay, outcome = self._script[min(self.calls, len(self._script) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def hedged(primary, fallback=None, hedge=None):
+    # Latency history is shared per agent name, so every test gets its own
+    return HedgedChatCompletionClient(f"hedge-test-{next(_names)}", primary, fallback=fallback, hedge=hedge)
+
+
+def test_percentile():
+    tracker = LatencyTracker()
+    assert tracker.percentile(95) is None
+    for seconds in range(1, 101):
+        tracker.record(float(seconds))
+    assert tracker.percentile(50) == 51.0
+    assert tracker.percentile(100) == 100.0
+
+
+def test_no_hedge_without_config():
+    primary = ScriptedClient((0.05, "slow"))
+    assert asyncio.run(hedged(primary).create([])) == "slow"
+    assert primary.calls == 1
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    primary = ScriptedClient((1.0, "slow"), (0.01, "fast"))
+    client = hedged(primary, hedge={"initial_delay": 0.05, "min_delay": 0.01})
+    assert asyncio.run(client.create([])) == "fast"
+    assert primary.calls == 2
+    assert primary.cancelled == 1
+
+
+def test_fast_call_is_not_hedged():
+    primary = ScriptedClient((0.01, "fast"))
+    client = hedged(primary, hedge={"initial_delay": 0.5})
+    assert asyncio.run(client.create([])) == "fast"
+    assert primary.calls == 1
+
+
+def test_hedge_delay_follows_observed_latency():
+    client = hedged(ScriptedClient((0.0, "ok")), hedge={"initial_delay": 5, "min_samples": 3, "percentile": 50, "min_delay": 0.1})
+    assert client.hedge_delay() == 5.0
+    for _ in range(3):
+        asyncio.run(client.create([]))
+    assert client.hedge_delay() == 0.1
+
+
+def test_failed_hedge_falls_back_to_the_other_call():
+    primary = ScriptedClient((0.2, "slow but fine"), (0.01, RuntimeError("hedge failed")))
+    client = hedged(primary, hedge={"initial_delay": 0.05, "min_delay": 0.01})
+    assert asyncio.run(client.create([])) == "slow but fine"
+
+
+def test_error_retries_on_fallback():
+    primary = ScriptedClient((0.0, RuntimeError("primary down")))
+    fallback = ScriptedClient((0.0, "from fallback"))
+    assert asyncio.run(hedged(primary, fallback=fallback).create([])) == "from fallback"
+    assert fallback.calls == 1
+
+
+def test_error_without_fallback_is_raised():
+    primary = ScriptedClient((0.0, RuntimeError("primary down")))
+    with pytest.raises(RuntimeError, match="primary down"):
+        asyncio.run(hedged(primary).create([]))
+
+
+@pytest.mark.parametrize("spec, error", [
+    ({"hedge": {"percentile": 0}}, "hedge.percentile must be between 0 and 100"),
+    ({"hedge": {"percentile": 150}}, "hedge.percentile must be between 0 and 100"),
+    ({"hedge": {"initial_delay": "5s"}}, "hedge.initial_delay must be a number"),
+    ({"hedge": {"min_delay": -1}}, "hedge.min_delay must not be negative"),
+    ({"hedge": {"min_samples": 2.5}}, "hedge.min_samples must be a positive integer"),
+    ({"hedge": {"window": 0}}, "hedge.window must be a positive integer"),
+    ({"hedge": {"percentil": 95}}, "Unknown hedge option: percentil (expected one of percentile, initial_delay, min_delay, min_samples, window)"),
+    ({"hedge": "yes"}, "hedge must be true, false or a mapping"),
+    ({"fallback_model": ""}, "fallback_model must be a model name"),
+    ({"fallback_model": 3}, "fallback_model must be a model name"),
+])
+def test_invalid_hedge_settings_are_rejected(spec, error):
+    assert Creator.validate_agent_spec({"agent_name": "a", "description": "d", "system_message": "s", **spec}) == [error]
+
+
+def test_valid_hedge_settings_are_accepted():
+    spec = {
+        "agent_name": "a", "description": "d", "system_message": "s", "fallback_model": "gemini-2.0-flash",
+        "hedge": {"percentile": 99.5, "initial_delay": 5, "min_delay": 0.5, "min_samples": 10, "window": 200},
+    }
+    assert Creator.validate_agent_spec(spec) == []
+    assert Creator.validate_agent_spec({**spec, "hedge": True}) == []
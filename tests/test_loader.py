@@ -0,0 +1,68 @@
+from src.utils import loader
+import inspect
+import os
+import pytest
+import sys
+
+SOURCE = "def answer():\n    return 42\n"
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, "BYTECODE_CACHE_DIR", str(tmp_path / "bytecode"))
+    monkeypatch.setattr(loader, "_code_cache", loader.OrderedDict())
+    monkeypatch.setattr(loader, "_modules", {})
+    yield
+    sys.modules.pop("loader_test_agent", None)
+
+
+def test_load_module_runs_source_without_a_file():
+    module = loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE)
+    assert module.answer() == 42
+    assert sys.modules["loader_test_agent"] is module
+    assert inspect.getsource(module.answer).startswith("def answer")
+
+
+def test_unchanged_source_reuses_the_module():
+    first = loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE)
+    assert loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE) is first
+
+
+def test_changed_source_builds_a_new_module():
+    first = loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE)
+    second = loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE.replace("42", "43"))
+    assert second is not first
+    assert second.answer() == 43
+    assert first.answer() == 42
+
+
+def test_failed_exec_keeps_the_previous_module():
+    first = loader.load_module("loader_test_agent", "generated/loader_test_agent.py", SOURCE)
+    with pytest.raises(ZeroDivisionError):
+        loader.load_module("loader_test_agent", "generated/loader_test_agent.py", "1 / 0\n")
+    assert sys.modules["loader_test_agent"] is first
+
+
+def test_bytecode_is_cached_on_disk_and_reused():
+    code = loader.compile_source("generated/loader_test_agent.py", SOURCE)
+    assert len(os.listdir(loader.BYTECODE_CACHE_DIR)) == 1
+
+    loader._code_cache.clear()
+    cached = loader.compile_source("generated/loader_test_agent.py", SOURCE)
+    assert cached.co_code == code.co_code
+    assert cached.co_filename == "generated/loader_test_agent.py"
+
+
+def test_syntax_errors_are_raised():
+    with pytest.raises(SyntaxError):
+        loader.compile_source("generated/broken.py", "def broken(:\n")
+
+
+def test_failed_cache_write_leaves_no_temporary_file(monkeypatch):
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(loader.os, "replace", fail_replace)
+    code = loader.compile_source("generated/loader_test_agent.py", SOURCE)
+    assert code.co_filename == "generated/loader_test_agent.py"
+    assert os.listdir(loader.BYTECODE_CACHE_DIR) == []
@@ -0,0 +1,42 @@
+from src.utils.utils import TruncatingFilter, _stop_log_listener, setup_logging
+import logging
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord("main", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_long_string_arguments_are_truncated():
+    record = make_record("%s sent %s (%d)", "fetcher", "x" * 30, 12345)
+    assert TruncatingFilter(10).filter(record)
+    assert record.args == ("fetcher", "x" * 10 + "... [20 more chars]", 12345)
+
+
+def test_short_arguments_and_opt_out_are_untouched():
+    short = make_record("%s", "x" * 10)
+    TruncatingFilter(10).filter(short)
+    assert short.args == ("x" * 10,)
+
+    opted_out = make_record("%s", "x" * 30, truncate=False)
+    TruncatingFilter(10).filter(opted_out)
+    assert opted_out.args == ("x" * 30,)
+
+
+def test_mapping_arguments_are_left_alone():
+    record = make_record("%(payload)s", {"payload": "x" * 30})
+    TruncatingFilter(10).filter(record)
+    assert record.args == {"payload": "x" * 30}
+
+
+def test_setup_logging_reads_limit_when_called(monkeypatch):
+    monkeypatch.setenv("LOG_PAYLOAD_LIMIT", "7")
+    try:
+        setup_logging()
+        handler = logging.getLogger().handlers[0]
+        limits = [f._limit for f in handler.filters if isinstance(f, TruncatingFilter)]
+    finally:
+        _stop_log_listener()
+        logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+    assert limits == [7]
@@ -0,0 +1,77 @@
+from autogen_core import FunctionCall
+from autogen_core.models import AssistantMessage, FunctionExecutionResult, FunctionExecutionResultMessage, UserMessage
+from src.agents.creator import Creator
+from src.utils.memory import TokenBudgetContext, TrimmedBufferContext, create_model_context, estimate_tokens
+import asyncio
+import pytest
+
+
+def user(text):
+    return UserMessage(content=text, source="user")
+
+
+def test_trimmed_buffer_drops_old_messages_from_storage():
+    async def scenario():
+        context = TrimmedBufferContext(buffer_size=2)
+        for i in range(5):
+            await context.add_message(user(f"m{i}"))
+        return context._messages, await context.get_messages()
+
+    stored, visible = asyncio.run(scenario())
+    assert [m.content for m in stored] == ["m3", "m4"]
+    assert [m.content for m in visible] == ["m3", "m4"]
+
+
+def test_token_budget_keeps_newest_messages_within_limit():
+    # Each 40 character message is estimated at 11 tokens
+    messages = [user(str(i) * 40) for i in range(4)]
+    assert estimate_tokens(messages[0]) == 11
+
+    async def scenario():
+        context = TokenBudgetContext(token_limit=25)
+        for message in messages:
+            await context.add_message(message)
+        return await context.get_messages()
+
+    assert asyncio.run(scenario()) == messages[2:]
+
+
+def test_token_budget_keeps_an_oversized_newest_message():
+    async def scenario():
+        context = TokenBudgetContext(token_limit=5)
+        await context.add_message(user("short"))
+        await context.add_message(user("x" * 100))
+        return await context.get_messages()
+
+    assert [m.content for m in asyncio.run(scenario())] == ["x" * 100]
+
+
+def test_token_budget_hides_orphaned_tool_results():
+    call = AssistantMessage(content=[FunctionCall(id="1", name="search", arguments="{}")], source="agent")
+    results = FunctionExecutionResultMessage(content=[FunctionExecutionResult(call_id="1", content="r" * 40, is_error=False, name="search")])
+
+    async def scenario():
+        context = TokenBudgetContext(token_limit=30)
+        for message in (call, results, user("q" * 40), user("a" * 40)):
+            await context.add_message(message)
+        return await context.get_messages()
+
+    # The call was trimmed, so its results cannot lead the history sent to the model
+    assert [m.content for m in asyncio.run(scenario())] == ["q" * 40, "a" * 40]
+
+
+def test_create_model_context_sizes_turns_by_tools():
+    assert create_model_context({"policy": "last_n", "turns": 3}, has_tools=True)._buffer_size == 12
+    assert create_model_context({"policy": "last_n", "turns": 3}, has_tools=False)._buffer_size == 6
+    assert create_model_context({}, has_tools=False) is None
+
+
+@pytest.mark.parametrize("memory, error", [
+    ({"policy": "last_n", "turns": 0}, "memory.turns must be a positive integer"),
+    ({"policy": "last_n", "turns": "5"}, "memory.turns must be a positive integer"),
+    ({"policy": "token_budget", "max_tokens": True}, "memory.max_tokens must be a positive integer"),
+    ({"reset_per_run": "no"}, "memory.reset_per_run must be true or false"),
+])
+def test_invalid_memory_settings_are_rejected(memory, error):
+    spec = {"agent_name": "a", "description": "d", "system_message": "s", "memory": memory}
+    assert Creator.validate_agent_spec(spec) == [error]
@@ -0,0 +1,68 @@
+from src.agents.creator import Creator
+from src.utils import plan as plan_module
+import os
+import pytest
+
+CONFIG = b"""
+agents:
+  - agent_name: fetcher
+    description: d
+    system_message: s
+    output_to: triage
+  - agent_name: triage
+    type: router
+    routes:
+      - regex: "(?i)error"
+        output_to: End
+    output_to: summarizer
+  - agent_name: summarizer
+    description: d
+    system_message: s
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(plan_module, "PLAN_CACHE_DIR", str(tmp_path / "plans"))
+    monkeypatch.setattr(plan_module, "_plans", {})
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "agents.yaml"
+    path.write_bytes(CONFIG)
+    return str(path)
+
+
+def test_cached_plan_round_trips(config_path, monkeypatch):
+    compiled = Creator.load_plan(config_path)
+    assert os.listdir(plan_module.PLAN_CACHE_DIR) == [f"{compiled.plan_id}.pickle"]
+
+    # A fresh process: nothing registered in memory, and compiling again would be a bug
+    monkeypatch.setattr(plan_module, "_plans", {})
+    monkeypatch.setattr(Creator, "compile_config", pytest.fail)
+    cached = Creator.load_plan(config_path)
+
+    assert cached is not compiled
+    assert cached == compiled
+    assert cached.route == ["fetcher", "triage", "summarizer"]
+    assert cached.get_agent("triage").routes[0].pattern.search("An ERROR occurred")
+
+
+def test_plan_version_change_invalidates_the_cache(config_path, monkeypatch):
+    first = Creator.load_plan(config_path)
+    monkeypatch.setattr(plan_module, "PLAN_VERSION", plan_module.PLAN_VERSION + "-next")
+    second = Creator.load_plan(config_path)
+
+    assert second.plan_id != first.plan_id
+    assert sorted(os.listdir(plan_module.PLAN_CACHE_DIR)) == sorted(f"{p.plan_id}.pickle" for p in (first, second))
+
+
+def test_unreadable_cache_entry_is_recompiled(config_path):
+    plan_id = plan_module.hash_config(CONFIG)
+    os.makedirs(plan_module.PLAN_CACHE_DIR)
+    with open(os.path.join(plan_module.PLAN_CACHE_DIR, f"{plan_id}.pickle"), "wb") as f:
+        f.write(b"not a pickle")
+
+    assert plan_module.read_cached_plan(plan_id) is None
+    assert Creator.load_plan(config_path).plan_id == plan_id
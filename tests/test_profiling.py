@@ -0,0 +1,15 @@
+from src.utils.profiling import LoopMonitor, sample_stacks
+import time
+
+
+def test_settings_are_read_when_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOOP_STALL_THRESHOLD", "1.5")
+    monkeypatch.setenv("PROFILE_SAMPLE_INTERVAL", "0.001")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+
+    assert LoopMonitor()._stall_threshold == 1.5
+    with sample_stacks("unit"):
+        time.sleep(0.05)
+
+    written = list(tmp_path.glob("unit-*.folded"))
+    assert len(written) == 1 and "test_settings_are_read_when_used" in written[0].read_text(encoding="utf-8")
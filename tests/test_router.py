@@ -0,0 +1,89 @@
+from src.agents.creator import Creator
+from src.agents.router import choose_route
+from src.utils.plan import RoutePlan
+import re
+
+
+def route(output_to, **conditions):
+    if "regex" in conditions:
+        conditions["pattern"] = re.compile(conditions.pop("regex"))
+    if "equals" in conditions:
+        conditions["check_equals"] = True
+    return RoutePlan(output_to=output_to, **conditions)
+
+
+def test_first_matching_route_wins():
+    routes = [route("short", max_length=5), route("shouty", regex="[A-Z]{3}")]
+    assert choose_route(routes, "default", "tiny") == "short"
+    assert choose_route(routes, "default", "LOUD NOISES") == "shouty"
+    assert choose_route(routes, "default", "nothing to see") == "default"
+
+
+def test_every_condition_of_a_route_must_hold():
+    routes = [route("long_alert", min_length=10, regex="alert")]
+    assert choose_route(routes, "default", "alert") == "default"
+    assert choose_route(routes, "default", "red alert, all hands") == "long_alert"
+
+
+def test_json_field_conditions():
+    routes = [
+        route("failed", field="result.status", equals="error"),
+        route("first_item", field="result.items.0"),
+        route("null", field="note", equals=None),
+    ]
+    assert choose_route(routes, "default", '{"result": {"status": "error"}}') == "failed"
+    assert choose_route(routes, "default", '{"result": {"status": "ok", "items": ["a"]}}') == "first_item"
+    assert choose_route(routes, "default", '{"result": {"items": []}, "note": null}') == "null"
+    assert choose_route(routes, "default", '{"note": "set"}') == "default"
+    assert choose_route(routes, "default", "not json") == "default"
+
+
+def test_json_in_a_code_fence_is_parsed():
+    routes = [route("failed", field="status", equals="error")]
+    assert choose_route(routes, "default", '```json\n{"status": "error"}\n```') == "failed"
+
+
+def test_validate_routes_reports_every_problem():
+    spec = {
+        "agent_name": "triage",
+        "type": "router",
+        "routes": [
+            {"output_to": "nowhere"},
+            {"regex": "(", "max_length": -1, "equals": 3, "colour": "red", "output_to": "End"},
+        ],
+    }
+    errors = Creator.validate_routes(spec, ["triage", "summarizer"])
+    assert errors == [
+        "Router triage route 0 references non-existent agent: nowhere",
+        "Router triage route 0 has no condition, use the router's output_to for the default route",
+        "Router triage route 1 has unknown keys: colour",
+        "Router triage route 1 max_length must be a non-negative integer",
+        "Router triage route 1 has an invalid regex '(': missing ), unterminated subpattern at position 0",
+        "Router triage route 1 uses equals without a field",
+    ]
+
+
+def test_validate_routes_requires_routes():
+    assert Creator.validate_routes({"agent_name": "triage", "type": "router"}, ["triage"]) == [
+        "Router triage needs a non-empty routes list"
+    ]
+
+
+def test_output_to_end_is_valid_for_any_agent():
+    agents = [
+        {"agent_name": "a", "output_to": "End"},
+        {"agent_name": "r", "type": "router", "routes": [{"max_length": 1, "output_to": "End"}], "output_to": "End"},
+    ]
+    assert Creator.validate_workflow(agents) == []
+
+
+def test_route_includes_agents_reached_only_through_branches():
+    agents = [
+        {"agent_name": "fetcher", "output_to": "triage"},
+        {"agent_name": "triage", "type": "router", "routes": [{"max_length": 1, "output_to": "fixer"}], "output_to": "summarizer"},
+        {"agent_name": "summarizer"},
+        {"agent_name": "fixer", "output_to": "checker"},
+        {"agent_name": "checker", "output_to": "summarizer"},
+        {"agent_name": "unreachable"},
+    ]
+    assert Creator.resolve_route(agents) == ["fetcher", "triage", "summarizer", "fixer", "checker"]
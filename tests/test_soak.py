@@ -0,0 +1,13 @@
+from src.agents.creator import Creator
+from src.utils.soak import unreloadable_files
+
+
+def test_reload_only_rewrites_soak_files():
+    config = {"agents": [
+        {"agent_name": "soak_a", "filename": "generated/soak_a.py", "description": "d", "system_message": "s", "output_to": "pick"},
+        {"agent_name": "pick", "type": "router", "routes": [{"min_length": 1, "output_to": "fetcher"}]},
+        {"agent_name": "fetcher", "filename": "generated/fetcher.py", "description": "d", "system_message": "s"},
+    ]}
+    plan = Creator.compile_plan(config, "test-soak-reload")
+
+    assert unreloadable_files(plan) == ["generated/fetcher.py"]
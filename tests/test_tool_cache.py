@@ -0,0 +1,111 @@
+from autogen_core import CancellationToken
+from src.utils.tools import ToolCache
+import asyncio
+import pytest
+
+
+class CountingCall:
+    def __init__(self, value="result", delay=0.0, error=None):
+        self.calls = 0
+        self.cancelled = 0
+        self._value = value
+        self._delay = delay
+        self._error = error
+
+    async def __call__(self, token):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def test_hit_after_miss():
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall()
+        first = await cache.call("k", 60, fn, CancellationToken())
+        second = await cache.call("k", 60, fn, CancellationToken())
+        return first, second, fn.calls
+
+    assert asyncio.run(scenario()) == ("result", "result", 1)
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall(delay=0.05)
+        results = await asyncio.gather(*(cache.call("k", 60, fn, CancellationToken()) for _ in range(5)))
+        return results, fn.calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["result"] * 5
+    assert calls == 1
+
+
+def test_expired_entry_is_refetched(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.tools.time.monotonic", lambda: now[0])
+
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall()
+        await cache.call("k", 10, fn, CancellationToken())
+        now[0] += 11
+        await cache.call("k", 10, fn, CancellationToken())
+        return fn.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_lru_evicts_oldest():
+    cache = ToolCache(max_size=2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    cache.get("a")
+    cache.put("c", 3, 60)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert len(cache) == 2
+
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall(error=ValueError("boom"))
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await cache.call("k", 60, fn, CancellationToken())
+        return fn.calls, len(cache)
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_one_waiter_cancelling_does_not_fail_the_others():
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall(delay=0.1)
+        token = CancellationToken()
+        leaving = asyncio.create_task(cache.call("k", 60, fn, token))
+        staying = asyncio.create_task(cache.call("k", 60, fn, CancellationToken()))
+        await asyncio.sleep(0.01)
+        token.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying, fn.calls, fn.cancelled
+
+    assert asyncio.run(scenario()) == ("result", 1, 0)
+
+
+def test_shared_call_is_cancelled_when_every_waiter_leaves():
+    async def scenario():
+        cache, fn = ToolCache(), CountingCall(delay=1.0)
+        token = CancellationToken()
+        task = asyncio.create_task(cache.call("k", 60, fn, token))
+        await asyncio.sleep(0.01)
+        token.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.01)
+        return fn.cancelled, len(cache)
+
+    assert asyncio.run(scenario()) == (1, 0)
@@ -0,0 +1,71 @@
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import ToolCallExecutionEvent
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import CreateResult, RequestUsage
+from autogen_core.tools import FunctionTool
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from src.utils.tools import LimitedTool, ToolTimeoutError, limit_tools
+from src.utils.utils import GEMINI_INFO
+import asyncio
+import pytest
+
+
+async def slow_search(query: str) -> str:
+    """Search slowly."""
+    await asyncio.sleep(1)
+    return f"slow {query}"
+
+
+async def fast_search(query: str) -> str:
+    """Search quickly."""
+    return f"fast {query}"
+
+
+def test_timed_out_call_becomes_an_error_result_next_to_the_others():
+    tools = limit_tools([FunctionTool(slow_search, "Search slowly."), FunctionTool(fast_search, "Search quickly.")], 0.05, None)
+    calls = [
+        FunctionCall(id="1", name="slow_search", arguments='{"query": "a"}'),
+        FunctionCall(id="2", name="fast_search", arguments='{"query": "b"}'),
+    ]
+    usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+    client = ReplayChatCompletionClient([CreateResult(finish_reason="function_calls", content=calls, usage=usage, cached=False)], GEMINI_INFO)
+    agent = AssistantAgent("searcher", model_client=client, tools=tools)
+
+    result = asyncio.run(agent.run(task="search"))
+
+    executed = next(m for m in result.messages if isinstance(m, ToolCallExecutionEvent))
+    by_name = {r.name: r for r in executed.content}
+    assert by_name["slow_search"].is_error and "timed out after 0.05s" in by_name["slow_search"].content
+    assert not by_name["fast_search"].is_error and by_name["fast_search"].content == "fast b"
+
+
+def test_timeout_raises_tool_timeout_error():
+    tool = LimitedTool(FunctionTool(slow_search, "Search slowly."), timeout=0.05)
+    with pytest.raises(ToolTimeoutError):
+        asyncio.run(tool.run_json({"query": "a"}, CancellationToken()))
+
+
+def test_semaphore_bounds_concurrent_calls():
+    running, peak = 0, 0
+
+    async def tracked(query: str) -> str:
+        """Record concurrency."""
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return query
+
+    async def scenario():
+        tools = limit_tools([FunctionTool(tracked, "Record concurrency.")], None, asyncio.Semaphore(2))
+        return await asyncio.gather(*(tools[0].run_json({"query": str(i)}, CancellationToken()) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [str(i) for i in range(6)]
+    assert peak == 2
+
+
+def test_limit_tools_without_limits_returns_tools_unchanged():
+    tools = [FunctionTool(fast_search, "Search quickly.")]
+    assert limit_tools(tools, None, None) is tools
+    assert isinstance(limit_tools(tools, None, None, {"fast_search": 5})[0], LimitedTool)
@@ -0,0 +1,89 @@
+from workflow_state import WorkflowState
+import asyncio
+
+
+def test_completion_is_delivered_per_run():
+    async def scenario():
+        state = WorkflowState()
+        state.start_run("a")
+        state.start_run("b")
+        state.set_completion("done a", "a")
+        state.set_error("failed b", "b")
+        return await state.wait_for_completion("a"), await state.wait_for_completion("b")
+
+    assert asyncio.run(scenario()) == ((True, "done a"), (False, "failed b"))
+
+
+def test_first_run_leads_and_identical_runs_join():
+    state = WorkflowState()
+    state.start_run("leader")
+    state.start_run("follower")
+    assert state.join_flight("key", "leader") is False
+    assert state.join_flight("key", "follower") is True
+    assert state.join_flight("other", "follower2") is False
+
+
+def test_followers_receive_the_leaders_result():
+    async def scenario():
+        state = WorkflowState()
+        for run_id in ("leader", "follower"):
+            state.start_run(run_id)
+            state.join_flight("key", run_id)
+        state.set_completion("shared", "leader")
+        return await state.wait_for_completion("leader"), await state.wait_for_completion("follower")
+
+    assert asyncio.run(scenario()) == ((True, "shared"), (True, "shared"))
+
+
+def test_followers_receive_the_leaders_error():
+    async def scenario():
+        state = WorkflowState()
+        for run_id in ("leader", "follower"):
+            state.start_run(run_id)
+            state.join_flight("key", run_id)
+        state.set_error("boom", "leader")
+        return await state.wait_for_completion("follower")
+
+    assert asyncio.run(scenario()) == (False, "boom")
+
+
+def test_shared_run_is_cancelled_only_when_every_waiter_leaves():
+    state = WorkflowState()
+    for run_id in ("leader", "follower"):
+        state.start_run(run_id)
+        state.join_flight("key", run_id)
+    token = state.get_cancellation_token("leader")
+
+    state.cancel_run("leader")
+    state.finish_run("leader")
+    assert not token.is_cancelled()
+    # Agents of the abandoned leader keep working for the follower
+    assert state.get_cancellation_token("leader") is token
+
+    state.cancel_run("follower")
+    assert token.is_cancelled()
+    assert state.join_flight("key", "next") is False
+
+
+def test_finished_flight_leaves_no_state_behind():
+    async def scenario():
+        state = WorkflowState()
+        for run_id in ("leader", "follower"):
+            state.start_run(run_id)
+            state.join_flight("key", run_id)
+        state.set_completion("shared", "leader")
+        await state.wait_for_completion("follower")
+        state.finish_run("leader")
+        state.finish_run("follower")
+        return state
+
+    state = asyncio.run(scenario())
+    assert not state._flights and not state._flights_by_leader and not state._flights_by_run and not state._runs
+
+
+def test_cancel_without_flight_cancels_the_run_token():
+    state = WorkflowState()
+    state.start_run("solo")
+    token = state.get_cancellation_token("solo")
+    state.cancel_run("solo")
+    assert token.is_cancelled()
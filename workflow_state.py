@@ -1,30 +1,132 @@
+from autogen_core import CancellationToken
+from src.utils.metrics import metrics
 import asyncio
-from typing import Optional, Tuple
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+DEFAULT_RUN_ID = "default"
+
+
+class RunState:
+    def __init__(self) -> None:
+        self.completion_event: asyncio.Event = asyncio.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        # Cancelled when the caller abandons the run, agents link their in-flight work to it
+        self.cancellation_token: CancellationToken = CancellationToken()
+
+
+class Flight:
+    """One executing run shared by every run that asked for the same work while it was in flight."""
+
+    def __init__(self, key: Hashable, leader: str, cancellation_token: CancellationToken) -> None:
+        self.key = key
+        self.leader = leader
+        self.cancellation_token = cancellation_token
+        self.waiters: Set[str] = {leader}
+
 
 class WorkflowState:
     def __init__(self) -> None:
-        self._completion_event: asyncio.Event = asyncio.Event()
-        self._result: Optional[str] = None
-        self._error: Optional[str] = None
+        self._runs: Dict[str, RunState] = {}
+        self._flights: Dict[Hashable, Flight] = {}
+        self._flights_by_leader: Dict[str, Flight] = {}
+        self._flights_by_run: Dict[str, Flight] = {}
+    
+    def _get_run(self, run_id: Optional[str]) -> RunState:
+        run_id = run_id or DEFAULT_RUN_ID
+        if run_id not in self._runs:
+            self._runs[run_id] = RunState()
+        return self._runs[run_id]
+    
+    def start_run(self, run_id: str) -> None:
+        self._runs[run_id] = RunState()
+    
+    def finish_run(self, run_id: str) -> None:
+        self._runs.pop(run_id, None)
+        self._leave_flight(run_id)
+    
+    def cancel_run(self, run_id: str) -> None:
+        """Cancel in-flight agent work for a run the caller no longer waits for."""
+        if run_id in self._flights_by_run:
+            # Shared work is only cancelled once nobody is waiting for it
+            self._leave_flight(run_id)
+            return
+        run = self._runs.get(run_id)
+        if run is not None:
+            run.cancellation_token.cancel()
+    
+    def get_cancellation_token(self, run_id: Optional[str]) -> Optional[CancellationToken]:
+        if run_id in self._flights_by_leader:
+            return self._flights_by_leader[run_id].cancellation_token
+        run = self._runs.get(run_id) if run_id else None
+        return run.cancellation_token if run is not None else None
+    
+    def join_flight(self, key: Hashable, run_id: str) -> bool:
+        """Attach a run to an identical run already in flight.
+
+        Returns True if the run joined an existing flight and will receive its result, or
+        False if no such flight exists and the run now leads a new one and must execute.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            run = self._get_run(run_id)
+            flight = Flight(key, run_id, run.cancellation_token)
+            self._flights[key] = flight
+            self._flights_by_leader[run_id] = flight
+            self._flights_by_run[run_id] = flight
+            metrics.increment("coalesce.leaders")
+            return False
+
+        flight.waiters.add(run_id)
+        self._flights_by_run[run_id] = flight
+        metrics.increment("coalesce.joined")
+        return True
+    
+    def _leave_flight(self, run_id: str) -> None:
+        flight = self._flights_by_run.pop(run_id, None)
+        if flight is None:
+            return
+        flight.waiters.discard(run_id)
+        if not flight.waiters:
+            self._end_flight(flight)
+            flight.cancellation_token.cancel()
+    
+    def _end_flight(self, flight: Flight) -> Set[str]:
+        self._flights.pop(flight.key, None)
+        self._flights_by_leader.pop(flight.leader, None)
+        for waiter in flight.waiters:
+            self._flights_by_run.pop(waiter, None)
+        return flight.waiters
+    
+    def _complete(self, run_id: Optional[str], result: Optional[str], error: Optional[str]) -> None:
+        flight = self._flights_by_leader.get(run_id) if run_id else None
+        run_ids = self._end_flight(flight) if flight is not None else {run_id}
+        for waiter in run_ids:
+            if waiter and waiter not in self._runs:
+                continue  # Run already finished or was abandoned by its caller
+            run = self._get_run(waiter)
+            run.result = result
+            run.error = error
+            run.completion_event.set()
     
-    def set_completion(self, result: str) -> None:
-        self._result = result
-        self._completion_event.set()
+    def set_completion(self, result: str, run_id: Optional[str] = None) -> None:
+        self._complete(run_id, result, None)
     
-    def set_error(self, error: str) -> None:
-        self._error = error
-        self._completion_event.set()
+    def set_error(self, error: str, run_id: Optional[str] = None) -> None:
+        self._complete(run_id, None, error)
     
-    async def wait_for_completion(self) -> Tuple[bool, str]:
-        await self._completion_event.wait()
-        if self._error:
-            return False, self._error
-        return True, self._result or "No result"
+    async def wait_for_completion(self, run_id: Optional[str] = None) -> Tuple[bool, str]:
+        run = self._get_run(run_id)
+        await run.completion_event.wait()
+        if run.error:
+            return False, run.error
+        return True, run.result or "No result"
     
     def reset(self) -> None:
-        self._completion_event.clear()
-        self._result = None
-        self._error = None
+        self._runs.clear()
+        self._flights.clear()
+        self._flights_by_leader.clear()
+        self._flights_by_run.clear()
 
 
-workflow_state = WorkflowState()
\ No newline at end of file
+workflow_state = WorkflowState()